@@ -0,0 +1,313 @@
+import json
+import os
+from circle_tracker import TRACK_FIELDS
+# numpy sadece sütun tabanlı biçimlerde gerekir; JSON/JSONL yolları onu yüklemez
+
+
+def to_builtin(obj):
+    if hasattr(obj, 'dtype'):
+        return obj.item() if obj.ndim == 0 else obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class AnalysisStreamWriter:
+    """Analiz sonuçlarını frame frame JSON Lines olarak yazar.
+
+    İlk satır video bilgisi, her frame için bir satır ve son satırda toplam
+    frame sayısı bulunur. Çalışma yarıda kesilse bile yazılan frame'ler diskte kalır.
+    """
+
+    def __init__(self, output_path, flush_interval=30):
+        self.output_path = output_path
+        self.flush_interval = flush_interval
+        self._file = open(output_path, 'w')
+        self._frames_since_flush = 0
+
+    def write_header(self, video_info):
+        self._write({'type': 'video_info', **video_info})
+        self._file.flush()
+
+    def write_frame(self, circle_entry, movement_entry):
+        self._write({'type': 'frame', 'circles': circle_entry, 'movement': movement_entry})
+        self._frames_since_flush += 1
+        if self._frames_since_flush >= self.flush_interval:
+            self._file.flush()
+            self._frames_since_flush = 0
+
+    def write_footer(self, video_info):
+        self._write({'type': 'end', 'total_frames': video_info['total_frames']})
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, default=to_builtin))
+        self._file.write('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_analysis_jsonl(results, output_path):
+    """Bellekteki bir sonuç sözlüğünü JSON Lines olarak yaz"""
+    movement_by_frame = {m.get('frame'): m for m in results.get('movement_data', [])}
+    with AnalysisStreamWriter(output_path) as writer:
+        video_info = dict(results.get('video_info', {}))
+        total_frames = video_info.pop('total_frames', None)
+        writer.write_header(video_info)
+        circle_data = results.get('circle_detection_data', [])
+        for circle_entry in circle_data:
+            writer.write_frame(circle_entry, movement_by_frame.get(circle_entry.get('frame')))
+        writer.write_footer({'total_frames': total_frames if total_frames is not None else len(circle_data)})
+
+
+def iter_analysis_jsonl(path):
+    """JSONL kayıtlarını (circle_entry, movement_entry) olarak sırayla oku"""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('type') == 'frame':
+                yield record['circles'], record['movement']
+
+
+def load_analysis_jsonl(path):
+    """JSONL dosyasından analyze_video ile aynı yapıda sonuç sözlüğü oluştur"""
+    video_info = {}
+    movement_data = []
+    circle_data = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop('type', None)
+            if kind == 'video_info':
+                video_info = record
+            elif kind == 'frame':
+                circle_data.append(record['circles'])
+                if record['movement'] is not None:
+                    movement_data.append(record['movement'])
+            elif kind == 'end':
+                video_info['total_frames'] = record['total_frames']
+    # Yarıda kalmış dosya: toplam frame sayısını okunan kayıtlardan çıkar
+    video_info.setdefault('total_frames', len(circle_data))
+    return {
+        'video_info': video_info,
+        'movement_data': movement_data,
+        'circle_detection_data': circle_data
+    }
+
+
+COLUMN_NAMES = (
+    'movement_frame', 'movement_velocity', 'movement_direction', 'movement_skipped',
+    'circle_frame', 'circles_count', 'circle_skipped',
+    'circles', 'circle_offsets', 'yellow_circles', 'yellow_offsets',
+)
+# Çember takibi açıksa eklenen sütunlar (satırlar TRACK_FIELDS sırasında)
+TRACK_COLUMN_NAMES = ('tracks', 'track_offsets')
+
+
+def results_to_columns(results):
+    """Sonuç sözlüğünü NumPy sütunlarına çevir.
+
+    Çemberler düz bir (N, 3) tabloda tutulur; frame i'nin çemberleri
+    circles[circle_offsets[i]:circle_offsets[i + 1]] aralığındadır.
+    """
+    import numpy as np
+    movement_data = results.get('movement_data', [])
+    circle_data = results.get('circle_detection_data', [])
+
+    columns = {
+        'movement_frame': np.array([m.get('frame', 0) for m in movement_data], dtype=np.int64),
+        'movement_velocity': np.array([m.get('velocity', 0) for m in movement_data], dtype=np.float64),
+        'movement_direction': np.array([m.get('direction', 0) for m in movement_data], dtype=np.float64),
+        'movement_skipped': np.array([bool(m.get('skipped')) for m in movement_data], dtype=bool),
+        'circle_frame': np.array([c.get('frame', 0) for c in circle_data], dtype=np.int64),
+        'circles_count': np.array([c.get('circles_count', 0) for c in circle_data], dtype=np.int64),
+        'circle_skipped': np.array([bool(c.get('skipped')) for c in circle_data], dtype=bool),
+    }
+    for key, offsets_key in (('circles', 'circle_offsets'), ('yellow_circles', 'yellow_offsets')):
+        offsets = np.zeros(len(circle_data) + 1, dtype=np.int64)
+        rows = []
+        for i, entry in enumerate(circle_data):
+            found = entry.get(key) or []
+            rows.extend(found)
+            offsets[i + 1] = offsets[i] + len(found)
+        columns[key] = np.array(rows, dtype=np.int32).reshape(-1, 3)
+        columns[offsets_key] = offsets
+    if any('tracks' in entry for entry in circle_data):
+        offsets = np.zeros(len(circle_data) + 1, dtype=np.int64)
+        rows = []
+        for i, entry in enumerate(circle_data):
+            tracks = entry.get('tracks') or []
+            rows.extend([track[field] for field in TRACK_FIELDS] for track in tracks)
+            offsets[i + 1] = offsets[i] + len(tracks)
+        columns['tracks'] = np.array(rows, dtype=np.float64).reshape(-1, len(TRACK_FIELDS))
+        columns['track_offsets'] = offsets
+    return columns
+
+
+def save_columnar(results, output_path):
+    """Sonuçları .npz dosyası ya da memory-map edilebilir .npy klasörü olarak kaydet"""
+    import numpy as np
+    columns = results_to_columns(results)
+    video_info = json.dumps(results.get('video_info', {}), default=to_builtin)
+    if output_path.endswith('.npz'):
+        np.savez(output_path, video_info=np.array(video_info), **columns)
+        return
+    os.makedirs(output_path, exist_ok=True)
+    for name, column in columns.items():
+        np.save(os.path.join(output_path, f"{name}.npy"), column)
+    with open(os.path.join(output_path, 'video_info.json'), 'w') as f:
+        f.write(video_info)
+
+
+def load_columnar(path, mmap=True):
+    return ColumnarAnalysis(path, mmap=mmap)
+
+
+class ColumnarAnalysis:
+    """Sütun tabanlı analiz sonuçları; sütunlar ilk erişimde yüklenir.
+
+    analyze_video sonucu gibi .get('movement_data') ve .get('circle_detection_data')
+    destekler, bu yüzden DecisionMaker doğrudan okuyabilir. Satırlar sadece
+    erişildiklerinde sözlüğe çevrilir.
+    """
+
+    def __init__(self, path, mmap=True):
+        import numpy as np
+        self.path = path
+        self._columns = {}
+        if path.endswith('.npz'):
+            self._npz = np.load(path)
+            self.video_info = json.loads(str(self._npz['video_info']))
+        else:
+            self._npz = None
+            self._mmap_mode = 'r' if mmap else None
+            with open(os.path.join(path, 'video_info.json')) as f:
+                self.video_info = json.load(f)
+
+    def column(self, name):
+        if name not in self._columns:
+            import numpy as np
+            if self._npz is not None:
+                self._columns[name] = self._npz[name]
+            else:
+                self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"),
+                                              mmap_mode=self._mmap_mode)
+        return self._columns[name]
+
+    def has_column(self, name):
+        if name in self._columns:
+            return True
+        if self._npz is not None:
+            return name in self._npz.files
+        return os.path.exists(os.path.join(self.path, f"{name}.npy"))
+
+    @property
+    def movement_data(self):
+        return _MovementRows(self)
+
+    @property
+    def circle_detection_data(self):
+        return _CircleRows(self)
+
+    def get(self, key, default=None):
+        if key == 'video_info':
+            return self.video_info
+        if key == 'movement_data':
+            return self.movement_data
+        if key == 'circle_detection_data':
+            return self.circle_detection_data
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        return {
+            'video_info': self.video_info,
+            'movement_data': list(self.movement_data),
+            'circle_detection_data': list(self.circle_detection_data)
+        }
+
+    def close(self):
+        if self._npz is not None:
+            self._npz.close()
+
+
+class _Rows:
+    def __init__(self, analysis):
+        self._analysis = analysis
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._row(index)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class _MovementRows(_Rows):
+    def __len__(self):
+        return len(self._analysis.column('movement_frame'))
+
+    def _row(self, i):
+        column = self._analysis.column
+        row = {
+            'velocity': float(column('movement_velocity')[i]),
+            'direction': float(column('movement_direction')[i]),
+            'frame': int(column('movement_frame')[i])
+        }
+        if column('movement_skipped')[i]:
+            row['skipped'] = True
+        return row
+
+
+class _CircleRows(_Rows):
+    def __len__(self):
+        return len(self._analysis.column('circle_frame'))
+
+    def _row(self, i):
+        column = self._analysis.column
+        circles = column('circles')[column('circle_offsets')[i]:column('circle_offsets')[i + 1]]
+        yellow = column('yellow_circles')[column('yellow_offsets')[i]:column('yellow_offsets')[i + 1]]
+        row = {
+            'frame': int(column('circle_frame')[i]),
+            'circles_count': int(column('circles_count')[i]),
+            'circles': [tuple(int(v) for v in c) for c in circles],
+            'yellow_circles': [tuple(int(v) for v in c) for c in yellow]
+        }
+        if self._analysis.has_column('tracks'):
+            tracks = column('tracks')[column('track_offsets')[i]:column('track_offsets')[i + 1]]
+            row['tracks'] = [_track_entry(track) for track in tracks]
+        if column('circle_skipped')[i]:
+            row['skipped'] = True
+        return row
+
+
+def _track_entry(values):
+    entry = dict(zip(TRACK_FIELDS, (float(v) for v in values)))
+    for field in ('id', 'x', 'y', 'r', 'age'):
+        entry[field] = int(entry[field])
+    entry['yellow'] = bool(entry['yellow'])
+    return entry
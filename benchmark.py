@@ -0,0 +1,147 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import cv2
+import numpy as np
+from synthetic_video import generate_synthetic_video
+from video_analysis import VideoAnalyzer, PreparedFrame
+from decision_maker import DecisionMaker
+
+# (genişlik, yükseklik, frame sayısı)
+DEFAULT_CLIPS = [(320, 240, 150), (640, 480, 150), (1280, 720, 150), (640, 480, 600)]
+QUICK_CLIPS = [(320, 240, 40), (640, 480, 40)]
+
+
+def _best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _decode_frames(video_path, limit):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def benchmark_clip(video_path, frames, repeat=3, detector_frames=30, analyzer_options=None):
+    """Tek bir klip için analiz, detector, karar ve rapor sürelerini ölç"""
+    analyzer_options = analyzer_options or {}
+    result = {}
+    
+    elapsed, analysis = _best_of(lambda: VideoAnalyzer(video_path, **analyzer_options).analyze_video(), repeat)
+    result['analyze_video'] = {'seconds': elapsed, 'frames_per_second': frames / elapsed}
+    
+    # Detector'lar önceden decode edilmiş frame'lerde ayrı ayrı ölçülür
+    decoded = _decode_frames(video_path, detector_frames)
+    analyzer = VideoAnalyzer(video_path, **analyzer_options)
+    grays = [PreparedFrame(frame).gray for frame in decoded]
+    stages = {
+        'detect_circles': lambda: [analyzer.detect_circles(frame) for frame in decoded],
+        'detect_yellow_circles': lambda: [analyzer.detect_yellow_circles(frame) for frame in decoded],
+        'track_movement': lambda: [analyzer.track_movement(grays[i], grays[i - 1]) for i in range(1, len(grays))],
+    }
+    for name, function in stages.items():
+        elapsed, _ = _best_of(function, repeat)
+        calls = len(decoded) - (1 if name == 'track_movement' else 0)
+        result[name] = {'seconds': elapsed, 'ms_per_frame': elapsed / max(calls, 1) * 1000}
+    
+    for engine in ('loop', 'vectorized'):
+        elapsed, decisions = _best_of(
+            lambda: DecisionMaker(engine=engine).analyze_decision_patterns(analysis), repeat)
+        result[f'decisions_{engine}'] = {'seconds': elapsed}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, 'report.txt')
+        elapsed, _ = _best_of(lambda: DecisionMaker().generate_decision_report(decisions, report_path), repeat)
+    result['generate_decision_report'] = {'seconds': elapsed}
+    return result
+
+
+def run_benchmarks(clips=DEFAULT_CLIPS, repeat=3, seed=0, analyzer_options=None):
+    results = {
+        'environment': environment_info(),
+        'analyzer_options': analyzer_options or {},
+        'clips': []
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height, frames in clips:
+            path = os.path.join(tmp, f"synthetic_{width}x{height}_{frames}.avi")
+            generate_synthetic_video(path, width, height, frames, seed=seed)
+            print(f"Benchmarking {width}x{height}, {frames} frames")
+            timings = benchmark_clip(path, frames, repeat=repeat, analyzer_options=analyzer_options)
+            results['clips'].append({'name': f"{width}x{height}_{frames}", 'width': width,
+                                     'height': height, 'frames': frames, 'timings': timings})
+            print(f"  analyze_video: {timings['analyze_video']['frames_per_second']:.1f} fps")
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads()
+    }
+
+
+def compare(baseline, current):
+    """İki benchmark sonucunu klip ve aşama bazında oranla (>1 yavaşlama)"""
+    baseline_clips = {clip['name']: clip for clip in baseline['clips']}
+    lines = []
+    for clip in current['clips']:
+        old = baseline_clips.get(clip['name'])
+        if old is None:
+            continue
+        lines.append(clip['name'])
+        for stage, timing in clip['timings'].items():
+            if stage in old['timings']:
+                ratio = timing['seconds'] / old['timings'][stage]['seconds']
+                flag = "  SLOWER" if ratio > 1.1 else ""
+                lines.append(f"  {stage:<26} {old['timings'][stage]['seconds']:.4f}s -> "
+                             f"{timing['seconds']:.4f}s  x{ratio:.2f}{flag}")
+    return '\n'.join(lines)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the analysis pipeline on synthetic ROV clips')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--quick', action='store_true', help='small clips only')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help='print ratios against an earlier run')
+    args = parser.parse_args()
+    
+    results = run_benchmarks(QUICK_CLIPS if args.quick else DEFAULT_CLIPS, repeat=args.repeat, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import math
+
+# Sonuçlardaki her track kaydının alanları (analysis_io sütunları da bu sırayı kullanır)
+TRACK_FIELDS = ('id', 'x', 'y', 'r', 'vx', 'vy', 'age', 'yellow')
+
+
+class CircleTrack:
+    """Frame'ler arasında izlenen tek bir çember"""
+    __slots__ = ('id', 'x', 'y', 'r', 'vx', 'vy', 'age', 'missed', 'last_frame', 'yellow')
+
+    def __init__(self, track_id, x, y, r, frame_count, yellow=False):
+        self.id = track_id
+        self.x = x
+        self.y = y
+        self.r = r
+        self.vx = 0.0
+        self.vy = 0.0
+        self.age = 1
+        self.missed = 0
+        self.last_frame = frame_count
+        self.yellow = yellow
+
+    def predict(self, frame_count):
+        """Sabit hız modeline göre frame_count'taki tahmini merkez"""
+        dt = frame_count - self.last_frame
+        return self.x + self.vx * dt, self.y + self.vy * dt
+
+    def to_entry(self):
+        return {'id': self.id, 'x': self.x, 'y': self.y, 'r': self.r,
+                'vx': round(self.vx, 4), 'vy': round(self.vy, 4),
+                'age': self.age, 'yellow': self.yellow}
+
+
+class CircleTracker:
+    """Çember tespitlerini frame'ler arasında eşleştirip kalıcı track ID'leri verir.
+
+    Eşleştirme, sabit hız modeliyle tahmin edilen konumlara göre açgözlü en
+    yakın komşudur: en kısa mesafeli çiftler önce eşlenir, max_distance'tan
+    uzak çiftler eşlenmez. max_missed frame boyunca görülmeyen track silinir.
+    Hızlar piksel/frame cinsindendir ve velocity_smoothing ile yumuşatılır.
+    """
+
+    def __init__(self, max_distance=50, max_missed=5, velocity_smoothing=0.5):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.velocity_smoothing = velocity_smoothing
+        self.tracks = []
+        self._next_id = 1
+
+    def parameters(self):
+        return {'max_distance': self.max_distance, 'max_missed': self.max_missed,
+                'velocity_smoothing': self.velocity_smoothing}
+
+    def update(self, circles, yellow_circles, frame_count):
+        """Bir frame'in tespitleriyle track'leri güncelle; bu frame'de görülen track'leri döndür.
+
+        Hough çemberleri ile sarı çemberler tek listede birleştirilir: bir
+        Hough çemberinin içinde merkezi kalan sarı tespit o çemberi sarı yapar,
+        eşleşmeyen sarı tespitler ayrı çember olarak izlenir.
+        """
+        detections = [[int(x), int(y), int(r), False] for (x, y, r) in circles]
+        for (yx, yy, yr) in yellow_circles:
+            for detection in detections:
+                if (yx - detection[0])**2 + (yy - detection[1])**2 <= max(detection[2], yr)**2:
+                    detection[3] = True
+                    break
+            else:
+                detections.append([int(yx), int(yy), int(yr), True])
+
+        pairs = []
+        for t, track in enumerate(self.tracks):
+            px, py = track.predict(frame_count)
+            for d, (x, y, _, _) in enumerate(detections):
+                distance = math.hypot(x - px, y - py)
+                if distance <= self.max_distance:
+                    pairs.append((distance, t, d))
+        pairs.sort()
+
+        matched_tracks = set()
+        matched_detections = set()
+        seen = []
+        for _, t, d in pairs:
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks.add(t)
+            matched_detections.add(d)
+            track = self.tracks[t]
+            x, y, r, yellow = detections[d]
+            dt = frame_count - track.last_frame
+            if dt > 0:
+                alpha = self.velocity_smoothing if track.age > 1 else 1.0
+                track.vx = alpha * (x - track.x) / dt + (1 - alpha) * track.vx
+                track.vy = alpha * (y - track.y) / dt + (1 - alpha) * track.vy
+            track.x, track.y, track.r = x, y, r
+            track.yellow = yellow
+            track.age += 1
+            track.missed = 0
+            track.last_frame = frame_count
+            seen.append(track)
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+        for d, (x, y, r, yellow) in enumerate(detections):
+            if d not in matched_detections:
+                track = CircleTrack(self._next_id, x, y, r, frame_count, yellow)
+                self._next_id += 1
+                survivors.append(track)
+                seen.append(track)
+        self.tracks = survivors
+        seen.sort(key=lambda track: track.id)
+        return seen
+
+    def predicted_circles(self, frame_count):
+        """Canlı track'lerin frame_count için tahmini (x, y, r) değerleri (ROI araması için)"""
+        predicted = []
+        for track in self.tracks:
+            x, y = track.predict(frame_count)
+            predicted.append((int(round(x)), int(round(y)), track.r))
+        return predicted
+
+
+def select_target_track(tracks, current_id=None, yellow_only=True):
+    """Planlayıcı için hedef track'i seç.
+
+    Mevcut hedef hâlâ görülüyorsa ona bağlı kalınır; değilse (tercihen sarı)
+    en uzun süredir izlenen track seçilir. Uygun track yoksa None döner.
+    """
+    if not tracks:
+        return None
+    for track in tracks:
+        if track['id'] == current_id:
+            return track
+    candidates = [t for t in tracks if t['yellow']] if yellow_only else list(tracks)
+    if not candidates:
+        return None
+    return max(candidates, key=lambda t: (t['age'], -t['id']))
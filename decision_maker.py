@@ -1,14 +1,184 @@
-import numpy as np
 import math
+from collections import deque
 from rov_path_planner import ROVPathPlanner, Position, Orientation
 
+# Vektörel motorda kararlar bu sıradaki kategorik kodlarla tutulur
+DECISION_LABELS = ('approach_yellow', 'stop', 'move', 'navigate', 'cruise')
+
+# Karar kurallarının eşikleri (hızlar piksel/frame, yön değişimleri derece);
+# aralıklar (alt, üst) olarak verilir ve iki uç da hariçtir
+DEFAULT_THRESHOLDS = {
+    'approach_min_velocity': 1.0,     # İlk frame'de sarıya yaklaşma "hızlanıyor" sayılır
+    'stop_velocity': 0.3,             # Bunun altı: dur
+    'move_velocity': 3.0,             # Bunun üstü: hızlı hareket
+    'move_direction_change': 15,      # Hızlı harekette "düz gidiyor" sınırı
+    'navigate_velocity': (0.5, 2.5),
+    'navigate_direction_change': 30,
+    'cruise_velocity': (1.0, 2.0),
+    'cruise_direction_change': 20,
+}
+
+class OnlineDecisionStats:
+    """Karar istatistiklerini frame başına O(1) zaman ve sabit bellekle biriktir.
+    
+    Toplam sayılar, ortalamalar, min/max ve değişim oranları tüm geçmiş
+    tutulmadan güncellenir. window_frames > 0 ise son window_frames karar
+    için ayrıca kayan pencere istatistikleri tutulur.
+    """
+    
+    def __init__(self, window_frames=0):
+        self.window_frames = window_frames
+        self.count = 0
+        self.good_decisions = 0
+        self.decision_counts = {}
+        self.decision_switches = 0
+        self.velocity_sum = 0.0
+        self.velocity_min = None
+        self.velocity_max = None
+        self.yaw_sum = 0.0
+        self.yaw_min = None
+        self.yaw_max = None
+        self.direction_change_sum = 0.0
+        self.circle_frames = 0
+        self.yellow_frames = 0
+        self.total_circles = 0
+        self.skipped_frames = 0
+        self._held_yellow = False
+        self._prev_direction = None
+        self._prev_decision = None
+        # Kayan pencere: toplamlar eklenen/çıkan kayıtla güncellenir,
+        # min/max monoton kuyruklarla amortize O(1)
+        self._window = deque()
+        self._window_good = 0
+        self._window_counts = {}
+        self._window_velocity_sum = 0.0
+        self._window_direction_change_sum = 0.0
+        self._window_switches = 0
+        self._window_velocity_min = deque()
+        self._window_velocity_max = deque()
+    
+    def add_circles(self, circle_entry):
+        """Bir çember kaydını ekle; atlanan frame'ler önceki sarı durumunu taşır"""
+        self.circle_frames += 1
+        if circle_entry.get('skipped'):
+            self.skipped_frames += 1
+        else:
+            self._held_yellow = bool(circle_entry.get('yellow_circles'))
+        if self._held_yellow:
+            self.yellow_frames += 1
+        self.total_circles += circle_entry.get('circles_count', 0)
+    
+    def add_decision(self, decision, quality, velocity, direction):
+        """Bir kararı ve o frame'in hız/yön değerlerini ekle"""
+        direction_change = abs(direction - self._prev_direction) if self._prev_direction is not None else 0
+        switched = self._prev_decision is not None and decision != self._prev_decision
+        good = quality > 0.7
+        
+        self.count += 1
+        self.good_decisions += good
+        self.decision_counts[decision] = self.decision_counts.get(decision, 0) + 1
+        self.decision_switches += switched
+        self.velocity_sum += velocity
+        self.velocity_min = velocity if self.velocity_min is None else min(self.velocity_min, velocity)
+        self.velocity_max = velocity if self.velocity_max is None else max(self.velocity_max, velocity)
+        self.yaw_sum += direction
+        self.yaw_min = direction if self.yaw_min is None else min(self.yaw_min, direction)
+        self.yaw_max = direction if self.yaw_max is None else max(self.yaw_max, direction)
+        self.direction_change_sum += direction_change
+        self._prev_direction = direction
+        self._prev_decision = decision
+        
+        if self.window_frames > 0:
+            self._push_window(self.count, decision, good, velocity, direction_change, switched)
+    
+    def _push_window(self, index, decision, good, velocity, direction_change, switched):
+        self._window.append((index, decision, good, velocity, direction_change, switched))
+        self._window_good += good
+        self._window_counts[decision] = self._window_counts.get(decision, 0) + 1
+        self._window_velocity_sum += velocity
+        self._window_direction_change_sum += direction_change
+        self._window_switches += switched
+        while self._window_velocity_min and self._window_velocity_min[-1][1] >= velocity:
+            self._window_velocity_min.pop()
+        self._window_velocity_min.append((index, velocity))
+        while self._window_velocity_max and self._window_velocity_max[-1][1] <= velocity:
+            self._window_velocity_max.pop()
+        self._window_velocity_max.append((index, velocity))
+        
+        if len(self._window) > self.window_frames:
+            old_index, old_decision, old_good, old_velocity, old_change, old_switched = self._window.popleft()
+            self._window_good -= old_good
+            self._window_counts[old_decision] -= 1
+            if not self._window_counts[old_decision]:
+                del self._window_counts[old_decision]
+            self._window_velocity_sum -= old_velocity
+            self._window_direction_change_sum -= old_change
+            self._window_switches -= old_switched
+            if self._window_velocity_min[0][0] == old_index:
+                self._window_velocity_min.popleft()
+            if self._window_velocity_max[0][0] == old_index:
+                self._window_velocity_max.popleft()
+    
+    def summary(self):
+        """analyze_decision_patterns ile aynı anahtarlarda o ana kadarki özet"""
+        if self.count < 1:
+            return {"total_decisions": 0, "decision_accuracy": 0.0, "average_velocity": 0.0}
+        avg_direction_change = self.direction_change_sum / (self.count - 1) if self.count > 1 else 0
+        return {
+            'decision_accuracy': self.good_decisions / self.count,
+            'total_decisions': self.count,
+            'average_velocity': self.velocity_sum / self.count,
+            'movement_efficiency': self.yellow_frames / self.count,
+            'decision_counts': dict(self.decision_counts),
+            'orientation_summary': {
+                'average_yaw': self.yaw_sum / self.count,
+                'min_yaw': self.yaw_min,
+                'max_yaw': self.yaw_max,
+                'average_yaw_change': avg_direction_change
+            },
+            'velocity_range': (self.velocity_min, self.velocity_max),
+            'decision_change_rate': self.decision_switches / (self.count - 1) if self.count > 1 else 0,
+            'total_circles_detected': self.total_circles,
+            'average_direction_change': avg_direction_change,
+            'good_decisions_count': self.good_decisions,
+            'skipped_frames': self.skipped_frames
+        }
+    
+    def window_summary(self):
+        """Son window_frames karar üzerindeki kayan pencere istatistikleri"""
+        size = len(self._window)
+        if size < 1:
+            return {'frames': 0}
+        # Penceredeki ilk kaydın yön/karar değişimi pencere dışındaki bir frame'e göre, sayılmaz
+        first_change = self._window[0][4]
+        first_switch = self._window[0][5]
+        return {
+            'frames': size,
+            'decision_accuracy': self._window_good / size,
+            'decision_counts': dict(self._window_counts),
+            'average_velocity': self._window_velocity_sum / size,
+            'velocity_range': (self._window_velocity_min[0][1], self._window_velocity_max[0][1]),
+            'average_direction_change': (self._window_direction_change_sum - first_change) / (size - 1) if size > 1 else 0,
+            'decision_change_rate': (self._window_switches - first_switch) / (size - 1) if size > 1 else 0
+        }
+
 class DecisionMaker:
     
-    def __init__(self):
+    def __init__(self, engine='loop', history_size=10000, thresholds=None):
         self.path_planner = ROVPathPlanner()
-        self.decision_history = []
+        # Videolar arası karar geçmişi sınırlı bir halka tamponda tutulur
+        self.decision_history = deque(maxlen=history_size)
+        # engine: 'loop' (frame frame Python döngüsü) ya da 'vectorized' (NumPy dizi işlemleri)
+        self.engine = engine
+        # thresholds: DEFAULT_THRESHOLDS'taki anahtarların bir kısmını ya da tümünü ezer
+        unknown = set(thresholds or {}) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown decision thresholds: {', '.join(sorted(unknown))}")
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
     
-    def analyze_decision_patterns(self, video_data):
+    def analyze_decision_patterns(self, video_data, engine=None):
+        if (engine or self.engine) == 'vectorized':
+            return self.analyze_decision_patterns_vectorized(video_data)
         movement_data = video_data.get('movement_data', [])
         circle_data = video_data.get('circle_detection_data', [])
         
@@ -16,8 +186,17 @@ class DecisionMaker:
             return {"total_decisions": 0, "decision_accuracy": 0.0, "average_velocity": 0.0}
         
         decisions = []
-        good_decisions = 0
         orientation_data = []  # Roll-pitch-yaw verileri
+        held_circles = None
+        stats = OnlineDecisionStats()
+        for circle_info in circle_data:
+            stats.add_circles(circle_info)
+        
+        # Frame numarasına göre tek geçişte indeks: her hareket kaydı için tüm
+        # çember listesini taramak videonun uzunluğuyla karesel büyüyordu
+        circles_by_frame = {}
+        for circle_info in circle_data:
+            circles_by_frame.setdefault(circle_info.get('frame'), circle_info)
         
         for i, data in enumerate(movement_data):
             velocity = data.get('velocity', 0)
@@ -40,14 +219,18 @@ class DecisionMaker:
             # Sarı çember kontrolü
             yellow_circles_in_frame = []
             normal_circles_in_frame = []
-            for circle_info in circle_data:
-                if circle_info.get('frame') == i:
-                    if circle_info.get('yellow_circles'):
-                        yellow_detected = True
-                        yellow_circles_in_frame = circle_info.get('yellow_circles')
-                    if circle_info.get('circles'):
-                        normal_circles_in_frame = circle_info.get('circles')
-                    break
+            frame_circles = circles_by_frame.get(i)
+            # Örneklemede atlanan frame'ler son analiz edilen frame'in tespitlerini kullanır
+            if frame_circles is not None and frame_circles.get('skipped'):
+                frame_circles = held_circles
+            elif frame_circles is not None:
+                held_circles = frame_circles
+            if frame_circles is not None:
+                if frame_circles.get('yellow_circles'):
+                    yellow_detected = True
+                    yellow_circles_in_frame = frame_circles.get('yellow_circles')
+                if frame_circles.get('circles'):
+                    normal_circles_in_frame = frame_circles.get('circles')
             
             # Video analizi tabanlı karar verme
             velocity_change = 0
@@ -59,88 +242,275 @@ class DecisionMaker:
                 velocity_change = abs(velocity - prev_velocity)
                 direction_change = abs(direction - prev_direction)
             
-            decision_made = False
-            decision_quality = 0  # 0-1 arası kalite skoru
-            
-            if yellow_detected:
-                decisions.append('approach_yellow')
-                # Sarı çembere yaklaşırken hız artışı = iyi karar
-                if velocity > prev_velocity if i > 0 else velocity > 1.0:
-                    decision_quality = 0.9
-                else:
-                    decision_quality = 0.6
-                decision_made = True
-                    
-            elif velocity < 0.3:  # Çok yavaş hareket
-                decisions.append('stop')
-                # Durma kararının kalitesi: çevrede engel var mı?
-                if len(normal_circles_in_frame) > 0:
-                    decision_quality = 0.8  # Engel var, durma mantıklı
-                else:
-                    decision_quality = 0.4  # Engel yok ama durmuş
-                decision_made = True
-                
-            elif velocity > 3.0:  # Hızlı hareket
-                decisions.append('move')
-                # Hızlı hareketin kalitesi: yön değişimi az mı?
-                if direction_change < 15:  # Düz gidiyor
-                    decision_quality = 0.8
-                else:
-                    decision_quality = 0.5  # Riskli
-                decision_made = True
-                
-            elif len(normal_circles_in_frame) > 0:  # Çember var
-                decisions.append('navigate')
-                # Navigasyon kalitesi: çember etrafında uygun hareket
-                if 0.5 < velocity < 2.5 and direction_change < 30:
-                    decision_quality = 0.8
-                else:
-                    decision_quality = 0.6
-                decision_made = True
+            decision, decision_quality = self._decide(
+                velocity, prev_velocity if i > 0 else None, direction_change,
+                yellow_detected, len(normal_circles_in_frame) > 0)
+            decisions.append(decision)
+            stats.add_decision(decision, decision_quality, velocity, direction)
+        
+        # Karar geçmişine ekle
+        self.decision_history.extend(decisions)
+        
+        results = stats.summary()
+        results['decisions'] = decisions
+        results['orientation_data'] = orientation_data
+        return results
+    def start_stream(self, fps=0.0, window_seconds=10.0):
+        """Canlı akış için artımlı karar durumunu sıfırla"""
+        window_frames = int(round((fps if fps > 0 else 30.0) * window_seconds))
+        self._stream = {
+            'recent_circles': {}, 'held_circles': None, 'prev_movement': None, 'index': 0,
+            'stats': OnlineDecisionStats(window_frames), 'window_seconds': window_seconds
+        }
+    def decide_frame(self, circle_entry, movement):
+        """Akıştan gelen tek bir frame kaydı için karar ver.
+        
+        Hareket kaydı i, analyze_decision_patterns'taki gibi frame i'nin çember
+        kaydıyla eşleşir; bu yüzden aynı veride toplu analizle aynı kararları verir.
+        Hareket kaydı olmayan (ilk) frame için None döner.
+        """
+        if not hasattr(self, '_stream'):
+            self.start_stream()
+        state = self._stream
+        stats = state['stats']
+        if circle_entry is not None:
+            state['recent_circles'].setdefault(circle_entry.get('frame'), circle_entry)
+            stats.add_circles(circle_entry)
+        if movement is None:
+            return None
+        
+        i = state['index']
+        frame_circles = state['recent_circles'].pop(i, None)
+        for frame in [f for f in state['recent_circles'] if f is None or f < i]:
+            del state['recent_circles'][frame]
+        if frame_circles is not None and frame_circles.get('skipped'):
+            frame_circles = state['held_circles']
+        elif frame_circles is not None:
+            state['held_circles'] = frame_circles
+        yellow_detected = bool(frame_circles and frame_circles.get('yellow_circles'))
+        circles_present = bool(frame_circles and frame_circles.get('circles'))
+        
+        velocity = movement.get('velocity', 0)
+        direction = movement.get('direction', 0)
+        prev = state['prev_movement']
+        prev_velocity = prev.get('velocity', 0) if prev is not None else None
+        direction_change = abs(direction - prev.get('direction', 0)) if prev is not None else 0
+        decision, decision_quality = self._decide(velocity, prev_velocity, direction_change,
+                                                  yellow_detected, circles_present)
+        
+        state['index'] += 1
+        state['prev_movement'] = movement
+        stats.add_decision(decision, decision_quality, velocity, direction)
+        self.decision_history.append(decision)
+        
+        return {
+            'frame': movement.get('frame', i + 1),
+            'decision': decision,
+            'quality': decision_quality,
+            'yellow_circles': frame_circles.get('yellow_circles', []) if yellow_detected else []
+        }
+    def analyze_decision_stream(self, frames):
+        """(circle_entry, movement) akışından sabit bellekle karar analizi.
+        
+        Kararlar decide_frame ile verilir; dönen özet analyze_decision_patterns'ınkiyle
+        aynı anahtarlara sahiptir ama frame başına karar/yönelim listeleri içermez.
+        """
+        self.start_stream()
+        for circle_entry, movement in frames:
+            self.decide_frame(circle_entry, movement)
+        return self._stream['stats'].summary()
+    def stream_summary(self):
+        """Akışın o ana kadarki özeti; generate_decision_report ile raporlanabilir"""
+        if not hasattr(self, '_stream'):
+            self.start_stream()
+        summary = self._stream['stats'].summary()
+        summary['window'] = self._stream['stats'].window_summary()
+        summary['window']['seconds'] = self._stream['window_seconds']
+        return summary
+    def _decide(self, velocity, prev_velocity, direction_change, yellow_detected, circles_present):
+        """Tek frame için karar ve 0-1 arası kalite skoru (prev_velocity ilk frame'de None)"""
+        t = self.thresholds
+        if yellow_detected:
+            decision = 'approach_yellow'
+            # Sarı çembere yaklaşırken hız artışı = iyi karar
+            if velocity > prev_velocity if prev_velocity is not None else velocity > t['approach_min_velocity']:
+                decision_quality = 0.9
+            else:
+                decision_quality = 0.6
                 
-            else:  # Varsayılan durum
-                decisions.append('cruise')
-                # Serbest hareket kalitesi: düzenli hız ve yön
-                if 1.0 < velocity < 2.0 and direction_change < 20:
-                    decision_quality = 0.7
-                else:
-                    decision_quality = 0.5
-                decision_made = True
+        elif velocity < t['stop_velocity']:  # Çok yavaş hareket
+            decision = 'stop'
+            # Durma kararının kalitesi: çevrede engel var mı?
+            if circles_present:
+                decision_quality = 0.8  # Engel var, durma mantıklı
+            else:
+                decision_quality = 0.4  # Engel yok ama durmuş
+            
+        elif velocity > t['move_velocity']:  # Hızlı hareket
+            decision = 'move'
+            # Hızlı hareketin kalitesi: yön değişimi az mı?
+            if direction_change < t['move_direction_change']:  # Düz gidiyor
+                decision_quality = 0.8
+            else:
+                decision_quality = 0.5  # Riskli
             
-            # Kalite skoruna göre good_decisions hesapla
-            if decision_quality > 0.7:
-                good_decisions += 1
-        
-        # Analiz tabanlı istatistik hesaplamaları
-        avg_velocity = sum(d.get('velocity', 0) for d in movement_data) / len(movement_data)
-        accuracy = good_decisions / len(decisions) if decisions else 0  # Kalite skorları
-        yellow_frames = sum(1 for d in circle_data if d.get('yellow_circles'))
-        efficiency = yellow_frames / len(movement_data) if movement_data else 0
-        
-        # Ek metrikler
-        total_circles = sum(d.get('circles_count', 0) for d in circle_data)
-        avg_direction_change = 0
-        if len(movement_data) > 1:
-            direction_changes = []
-            for i in range(1, len(movement_data)):
-                prev_dir = movement_data[i-1].get('direction', 0)
-                curr_dir = movement_data[i].get('direction', 0)
-                direction_changes.append(abs(curr_dir - prev_dir))
-            avg_direction_change = sum(direction_changes) / len(direction_changes)
+        elif circles_present:  # Çember var
+            decision = 'navigate'
+            # Navigasyon kalitesi: çember etrafında uygun hareket
+            low, high = t['navigate_velocity']
+            if low < velocity < high and direction_change < t['navigate_direction_change']:
+                decision_quality = 0.8
+            else:
+                decision_quality = 0.6
+            
+        else:  # Varsayılan durum
+            decision = 'cruise'
+            # Serbest hareket kalitesi: düzenli hız ve yön
+            low, high = t['cruise_velocity']
+            if low < velocity < high and direction_change < t['cruise_direction_change']:
+                decision_quality = 0.7
+            else:
+                decision_quality = 0.5
+        return decision, decision_quality
+    def analyze_decision_patterns_vectorized(self, video_data):
+        """Karar analizini frame döngüsü olmadan NumPy dizileriyle yap.
+
+        Kararlar, kalite skorları ve özet metrikler döngü motoruyla aynı
+        kurallardan hesaplanır; kararlar ayrıca DECISION_LABELS kodları olarak döner.
+        """
+        import numpy as np
+        arrays = self._decision_arrays(video_data)
+        velocity = arrays['velocity']
+        direction = arrays['direction']
+        count = len(velocity)
         
-        # Karar geçmişine ekle
+        if count < 1:
+            return {"total_decisions": 0, "decision_accuracy": 0.0, "average_velocity": 0.0}
+        
+        prev_velocity = np.empty(count)
+        prev_velocity[0] = 0.0
+        prev_velocity[1:] = velocity[:-1]
+        direction_change = np.zeros(count)
+        direction_change[1:] = np.abs(np.diff(direction))
+        yellow = arrays['yellow']
+        normal = arrays['normal']
+        
+        # Döngüdeki if/elif sırası: sarı > dur > hızlı > çember > serbest
+        t = self.thresholds
+        stop = ~yellow & (velocity < t['stop_velocity'])
+        move = ~yellow & ~stop & (velocity > t['move_velocity'])
+        navigate = ~yellow & ~stop & ~move & normal
+        codes = np.select([yellow, stop, move, navigate], [0, 1, 2, 3], default=4).astype(np.int8)
+        
+        speeding_up = np.where(np.arange(count) > 0, velocity > prev_velocity, velocity > t['approach_min_velocity'])
+        navigate_low, navigate_high = t['navigate_velocity']
+        cruise_low, cruise_high = t['cruise_velocity']
+        quality = np.select(
+            [yellow, stop, move, navigate],
+            [np.where(speeding_up, 0.9, 0.6),
+             np.where(normal, 0.8, 0.4),
+             np.where(direction_change < t['move_direction_change'], 0.8, 0.5),
+             np.where((velocity > navigate_low) & (velocity < navigate_high)
+                      & (direction_change < t['navigate_direction_change']), 0.8, 0.6)],
+            default=np.where((velocity > cruise_low) & (velocity < cruise_high)
+                             & (direction_change < t['cruise_direction_change']), 0.7, 0.5))
+        good_decisions = int(np.count_nonzero(quality > 0.7))
+        
+        # Roll-pitch-yaw izleri: döngüdeki Position/Orientation hesabıyla aynı
+        frames = np.arange(count)
+        position = np.zeros((count, 3))
+        position[:, 0] = frames * 2.5 + velocity * 5
+        position[:, 1] = velocity * np.sin(np.radians(direction)) * 3
+        orientation = np.zeros((count, 3))
+        orientation[:, 2] = direction
+        
+        avg_direction_change = float(np.mean(direction_change[1:])) if count > 1 else 0
+        decisions = [DECISION_LABELS[code] for code in codes]
         self.decision_history.extend(decisions)
         
+        # Rapordaki karar dağılımı ilk görülme sırasını korur
+        present, first_seen, counts = np.unique(codes, return_index=True, return_counts=True)
+        order = np.argsort(first_seen)
+        decision_counts = {DECISION_LABELS[present[i]]: int(counts[i]) for i in order}
+        
         return {
-            'decision_accuracy': accuracy,
-            'total_decisions': len(decisions),
-            'average_velocity': avg_velocity,
-            'movement_efficiency': efficiency,
+            'decision_accuracy': good_decisions / count,
+            'total_decisions': count,
+            'average_velocity': float(np.mean(velocity)),
+            'movement_efficiency': arrays['yellow_frames'] / count,
             'decisions': decisions,
-            'orientation_data': orientation_data,
-            'total_circles_detected': total_circles,
+            'decision_codes': codes,
+            'decision_quality': quality,
+            'decision_counts': decision_counts,
+            'orientation_track': {'frame': frames, 'position': position, 'orientation': orientation},
+            'orientation_summary': {
+                'average_yaw': float(np.mean(direction)),
+                'min_yaw': float(np.min(direction)),
+                'max_yaw': float(np.max(direction)),
+                'average_yaw_change': avg_direction_change
+            },
+            'total_circles_detected': arrays['total_circles'],
             'average_direction_change': avg_direction_change,
-            'good_decisions_count': good_decisions
+            'good_decisions_count': good_decisions,
+            'skipped_frames': arrays['skipped_frames']
+        }
+    def _decision_arrays(self, video_data):
+        """Hareket ve çember verisini karar motorunun dizi girdilerine çevir"""
+        import numpy as np
+        if hasattr(video_data, 'column'):
+            # Sütun tabanlı sonuçlar (analysis_io.ColumnarAnalysis): satırlara hiç dönülmez
+            velocity = np.asarray(video_data.column('movement_velocity'), dtype=np.float64)
+            direction = np.asarray(video_data.column('movement_direction'), dtype=np.float64)
+            circle_frame = np.asarray(video_data.column('circle_frame'))
+            circles_count = np.asarray(video_data.column('circles_count'))
+            skipped = np.asarray(video_data.column('circle_skipped'), dtype=bool)
+            has_normal = np.diff(video_data.column('circle_offsets')) > 0
+            has_yellow = np.diff(video_data.column('yellow_offsets')) > 0
+        else:
+            movement_data = video_data.get('movement_data', [])
+            circle_data = video_data.get('circle_detection_data', [])
+            velocity = np.array([d.get('velocity', 0) for d in movement_data], dtype=np.float64)
+            direction = np.array([d.get('direction', 0) for d in movement_data], dtype=np.float64)
+            circle_frame = np.array([d.get('frame', -1) for d in circle_data], dtype=np.int64)
+            circles_count = np.array([d.get('circles_count', 0) for d in circle_data], dtype=np.int64)
+            skipped = np.array([bool(d.get('skipped')) for d in circle_data], dtype=bool)
+            has_normal = np.array([bool(d.get('circles')) for d in circle_data], dtype=bool)
+            has_yellow = np.array([bool(d.get('yellow_circles')) for d in circle_data], dtype=bool)
+        count = len(velocity)
+        
+        if len(circle_frame):
+            # Hareket kaydı i, frame numarası i olan ilk çember kaydıyla eşleşir
+            entry = np.full(count, -1, dtype=np.int64)
+            unique_frames, first_index = np.unique(circle_frame, return_index=True)
+            in_range = (unique_frames >= 0) & (unique_frames < count)
+            entry[unique_frames[in_range]] = first_index[in_range]
+            # Atlanan frame'ler son analiz edilen frame'in tespitlerini taşır
+            source = np.where((entry >= 0) & ~skipped[np.maximum(entry, 0)], np.arange(count), -1)
+            held = np.maximum.accumulate(source) if count else source
+            used = np.where((entry >= 0) & skipped[np.maximum(entry, 0)], held, source)
+            used_entry = np.where(used >= 0, entry[np.maximum(used, 0)], -1)
+            valid = used_entry >= 0
+            yellow = valid & has_yellow[np.maximum(used_entry, 0)]
+            normal = valid & has_normal[np.maximum(used_entry, 0)]
+        else:
+            # Çember kaydı yok: hiçbir frame'de sarı ya da normal çember yok
+            yellow = np.zeros(count, dtype=bool)
+            normal = np.zeros(count, dtype=bool)
+        
+        # Verimlilik: çember kayıtları liste sırasında, atlananlar önceki sarı durumunu taşır
+        positions = np.arange(len(circle_frame))
+        last_analyzed = np.maximum.accumulate(np.where(~skipped, positions, -1)) if len(circle_frame) else positions
+        yellow_frames = int(np.count_nonzero((last_analyzed >= 0) & has_yellow[np.maximum(last_analyzed, 0)])) \
+            if len(circle_frame) else 0
+        
+        return {
+            'velocity': velocity,
+            'direction': direction,
+            'yellow': yellow,
+            'normal': normal,
+            'yellow_frames': yellow_frames,
+            'skipped_frames': int(np.count_nonzero(skipped)),
+            'total_circles': int(np.sum(circles_count))
         }
     def generate_decision_report(self, analysis_results, output_path):
         """Karar analizi raporunu oluştur"""
@@ -153,44 +523,68 @@ class DecisionMaker:
         report.append(f"Yellow Target Efficiency: {analysis_results.get('movement_efficiency', 0):.1%}")
         report.append(f"Circles Detected: {analysis_results.get('total_circles_detected', 0)}")
         report.append(f"Avg Direction Change: {analysis_results.get('average_direction_change', 0):.1f}°/frame")
+        if analysis_results.get('skipped_frames'):
+            report.append(f"Skipped Frames: {analysis_results['skipped_frames']}")
         
         # Karar türleri analizi
         decisions = analysis_results.get('decisions', [])
         orientation_data = analysis_results.get('orientation_data', [])
         
-        if decisions:
+        if decisions or analysis_results.get('decision_counts'):
             report.append("")
             report.append("DECISION BREAKDOWN:")
             report.append("-" * 20)
             
             # Karar türlerini say
-            decision_types = {}
-            for decision in decisions:
-                decision_types[decision] = decision_types.get(decision, 0) + 1
+            decision_types = analysis_results.get('decision_counts')
+            if decision_types is None:
+                decision_types = {}
+                for decision in decisions:
+                    decision_types[decision] = decision_types.get(decision, 0) + 1
             
+            total = sum(decision_types.values())
             for decision_type, count in decision_types.items():
-                percentage = (count / len(decisions)) * 100
+                percentage = (count / total) * 100
                 report.append(f"  {decision_type}: {count} ({percentage:.1f}%)")
         
+        orientation_summary = analysis_results.get('orientation_summary')
+        
         # Roll-Pitch-Yaw analiz sonuçları
-        if orientation_data:
+        if orientation_data or orientation_summary:
             report.append("")
             report.append("ORIENTATION ANALYSIS :")
             report.append("-" * 45)
             
-            yaw_values = [data['orientation'][2] for data in orientation_data]
-            yaw_changes = [abs(yaw_values[i] - yaw_values[i-1]) for i in range(1, len(yaw_values))]
-            
-            avg_yaw = sum(yaw_values) / len(yaw_values)
-            min_yaw = min(yaw_values)
-            max_yaw = max(yaw_values)
-            avg_yaw_change = sum(yaw_changes) / len(yaw_changes) if yaw_changes else 0
+            if orientation_summary:
+                avg_yaw = orientation_summary['average_yaw']
+                min_yaw = orientation_summary['min_yaw']
+                max_yaw = orientation_summary['max_yaw']
+                avg_yaw_change = orientation_summary['average_yaw_change']
+            else:
+                yaw_values = [data['orientation'][2] for data in orientation_data]
+                yaw_changes = [abs(yaw_values[i] - yaw_values[i-1]) for i in range(1, len(yaw_values))]
+                
+                avg_yaw = sum(yaw_values) / len(yaw_values)
+                min_yaw = min(yaw_values)
+                max_yaw = max(yaw_values)
+                avg_yaw_change = sum(yaw_changes) / len(yaw_changes) if yaw_changes else 0
             
             report.append(f"  Average Yaw: {avg_yaw:.1f}°")
             report.append(f"  Yaw Range: {min_yaw:.1f}° to {max_yaw:.1f}°")
             report.append(f"  Avg Yaw Change: {avg_yaw_change:.1f}°/frame")
             report.append(f"  Orientation Stability: {'High' if avg_yaw_change < 5 else 'Medium' if avg_yaw_change < 15 else 'Low'}")
         
+        window = analysis_results.get('window')
+        if window and window.get('frames'):
+            report.append("")
+            report.append(f"RECENT WINDOW (last {window['seconds']:g}s, {window['frames']} frames):")
+            report.append("-" * 45)
+            report.append(f"  Decision Quality: {window['decision_accuracy']:.1%}")
+            report.append(f"  Average Speed: {window['average_velocity']:.2f} units/frame")
+            report.append(f"  Avg Direction Change: {window['average_direction_change']:.1f}°/frame")
+            report.append(f"  Decision Change Rate: {window['decision_change_rate']:.1%}")
+            report.append("  " + ", ".join(f"{d}: {c}" for d, c in window['decision_counts'].items()))
+        
         with open(output_path, 'w') as f:
             f.write('\n'.join(report))
     def visualize_decision_analysis(self, analysis_results, save_path=None):
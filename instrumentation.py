@@ -0,0 +1,180 @@
+import json
+import sys
+import threading
+import time
+from array import array
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """Ölçüm kapalıyken kullanılan boş nesne; her çağrı hiçbir şey yapmaz"""
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def frame_done(self, latency):
+        pass
+
+    def sample_queue(self, name, depth):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class _Stage:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Aşama bazlı süre, sayaç, frame gecikmesi ve kuyruk derinliği ölçümleri.
+
+    Pipeline modunda detector thread'leri de yazdığı için güncellemeler kilitlidir.
+    """
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.queues = {}
+        self.latencies = array('d')
+        self.started = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] = max(stage[2], seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def frame_done(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def sample_queue(self, name, depth):
+        with self._lock:
+            queue = self.queues.setdefault(name, [0, 0, 0])
+            queue[0] += 1
+            queue[1] += depth
+            queue[2] = max(queue[2], depth)
+
+    def state(self):
+        """Ham ölçümler; başka süreçten pickle ile taşınıp merge edilebilir"""
+        with self._lock:
+            return {
+                'stages': {name: list(stage) for name, stage in self.stages.items()},
+                'counters': dict(self.counters),
+                'queues': {name: list(queue) for name, queue in self.queues.items()},
+                'latencies': self.latencies.tolist()
+            }
+
+    def merge(self, state):
+        """Başka bir Metrics'in state() çıktısını bu ölçümlere ekle (parçalı analiz için)"""
+        with self._lock:
+            for name, (calls, total, longest) in state['stages'].items():
+                stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+                stage[0] += calls
+                stage[1] += total
+                stage[2] = max(stage[2], longest)
+            for name, value in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, (samples, total, deepest) in state['queues'].items():
+                queue = self.queues.setdefault(name, [0, 0, 0])
+                queue[0] += samples
+                queue[1] += total
+                queue[2] = max(queue[2], deepest)
+            self.latencies.extend(state['latencies'])
+
+    def summary(self):
+        wall_time = time.perf_counter() - self.started
+        frames = len(self.latencies)
+        latencies = sorted(self.latencies)
+        return {
+            'wall_time_s': wall_time,
+            'frames': frames,
+            'frames_per_second': frames / wall_time if wall_time > 0 else 0.0,
+            'frame_latency_ms': {
+                'p50': percentile(latencies, 50) * 1000,
+                'p95': percentile(latencies, 95) * 1000,
+                'p99': percentile(latencies, 99) * 1000,
+                'max': latencies[-1] * 1000 if latencies else 0.0
+            },
+            'stages': {
+                name: {
+                    'calls': calls,
+                    'total_s': total,
+                    'mean_ms': total / calls * 1000 if calls else 0.0,
+                    'max_ms': longest * 1000,
+                    'share_of_wall': total / wall_time if wall_time > 0 else 0.0
+                }
+                for name, (calls, total, longest) in sorted(self.stages.items(), key=lambda s: -s[1][1])
+            },
+            'counters': dict(self.counters),
+            'queue_depth': {
+                name: {'samples': samples, 'mean': total / samples if samples else 0.0, 'max': deepest}
+                for name, (samples, total, deepest) in self.queues.items()
+            },
+            'peak_memory_mb': peak_memory_mb()
+        }
+
+    def save(self, output_path):
+        with open(output_path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+def percentile(sorted_values, percent):
+    """Sıralı değerlerde en yakın sıra yüzdeliği (boş listede 0.0)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_memory_mb():
+    """Sürecin en yüksek RSS değeri (Linux'ta KB, macOS'ta byte döner)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
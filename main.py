@@ -1,14 +1,45 @@
+import json
 import os
 import sys
-from video_analysis import VideoAnalyzer
+import time
 from decision_maker import DecisionMaker
+from analysis_io import (AnalysisStreamWriter, iter_analysis_jsonl, load_analysis_jsonl, load_columnar,
+                         save_columnar, write_analysis_jsonl)
+from result_cache import AnalysisCache
+from instrumentation import Metrics, NULL_METRICS
+# video_analysis (OpenCV + NumPy) bir video açılana kadar yüklenmez; rapor yolu onsuz çalışır
 class ROVAnalysisSystem:
-    def __init__(self, videos_dir, output_dir="results"):
+    def __init__(self, videos_dir, output_dir="results", announce=True, analyzer_options=None,
+                 stream_results=False, results_format='json', decision_engine='loop',
+                 cache_dir=None, cache_max_bytes=1 << 30, invalidate_cache=False, profile=False, chunks=1):
         self.videos_dir = videos_dir
         self.output_dir = output_dir
+        self.analyzer_options = analyzer_options or {}
+        # stream_results: sonuçlar frame frame *_analysis.jsonl dosyasına yazılır
+        self.stream_results = stream_results
+        if stream_results and results_format != 'json':
+            raise ValueError("Streamed results are always JSONL; results_format must be 'json'")
+        # keep_history=False (sınırlı bellek): frame geçmişi hiçbir aşamada belleğe alınmaz,
+        # bu yüzden tüm sonucu bellekte tutan önbellek ve parçalı analizle birlikte kullanılamaz
+        self.bounded_memory = not self.analyzer_options.get('keep_history', True)
+        if self.bounded_memory and (not stream_results or cache_dir or chunks > 1):
+            raise ValueError("keep_history=False needs stream_results and no cache_dir or chunks")
+        # results_format: 'json', 'npz' ya da 'npy' (sütun tabanlı, memory-map edilebilir klasör)
+        self.results_format = results_format
         os.makedirs(output_dir, exist_ok=True)
-        self.decision_maker = DecisionMaker()
-        print(f"System started: {videos_dir} -> {output_dir}")
+        self.decision_engine = decision_engine
+        self.decision_maker = DecisionMaker(engine=decision_engine)
+        # cache_dir: video parmak izi + detector parametreleriyle anahtarlanan analiz önbelleği
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.invalidate_cache = invalidate_cache
+        self.cache = AnalysisCache(cache_dir, cache_max_bytes) if cache_dir else None
+        # profile: her video için *_metrics.json (aşama süreleri, fps, gecikme yüzdelikleri)
+        self.profile = profile
+        # chunks > 1: tek video frame aralıklarına bölünüp ayrı süreçlerde analiz edilir
+        self.chunks = chunks
+        if announce:
+            print(f"System started: {videos_dir} -> {output_dir}")
     def find_videos(self):
         videos = []
         for file in os.listdir(self.videos_dir):
@@ -16,41 +47,372 @@ class ROVAnalysisSystem:
                 videos.append(os.path.join(self.videos_dir, file))
         return videos
     def analyze_video(self, video_path):
+        from video_analysis import VideoAnalyzer
         print(f"Analyzing: {os.path.basename(video_path)}")
-        analyzer = VideoAnalyzer(video_path)
-        results = analyzer.analyze_video()
-        
+        metrics = Metrics() if self.profile else NULL_METRICS
+        analyzer = VideoAnalyzer(video_path, metrics=metrics, **self.analyzer_options)
         name = os.path.splitext(os.path.basename(video_path))[0]
-        results_file = os.path.join(self.output_dir, f"{name}_analysis.json")
-        analyzer.save_analysis_results(results, results_file)
+        results = None
+        if self.cache is not None:
+            cache_key = self.cache.key(video_path, analyzer.detector_parameters())
+            if self.invalidate_cache:
+                self.cache.invalidate(cache_key)
+            results = self.cache.get(cache_key)
+        if results is not None:
+            # Önbellekten: video decode edilmez, sadece karar aşaması yeniden çalışır
+            print(f"Cache hit: {os.path.basename(video_path)}")
+            results['video_info']['path'] = video_path
+            metrics.count('cache_hits')
+            with metrics.stage('write_results'):
+                self._save_results(analyzer, results, name)
+        else:
+            if not analyzer.cap.isOpened():
+                # Okunamayan video 0 frame'lik "başarılı" analiz yerine toplu özette hata olarak görünür
+                raise IOError(f"Cannot open video: {video_path}")
+            if self.chunks > 1:
+                results = self._run_chunked(analyzer, video_path, name)
+            else:
+                results = self._run_analyzer(analyzer, name)
+            if self.cache is not None:
+                self.cache.put(cache_key, results)
         
-        decision_results = self.decision_maker.analyze_decision_patterns(results)
+        with metrics.stage('decisions'):
+            if self.bounded_memory:
+                # Kararlar JSONL'den frame frame verilir; geçmiş belleğe yüklenmez
+                results_file = os.path.join(self.output_dir, f"{name}_analysis.jsonl")
+                decision_results = self.decision_maker.analyze_decision_stream(iter_analysis_jsonl(results_file))
+            else:
+                decision_results = self.decision_maker.analyze_decision_patterns(results)
         report_file = os.path.join(self.output_dir, f"{name}_report.txt")
-        self.decision_maker.generate_decision_report(decision_results, report_file)
+        with metrics.stage('report'):
+            self.decision_maker.generate_decision_report(decision_results, report_file)
+        if metrics.enabled:
+            metrics.save(os.path.join(self.output_dir, f"{name}_metrics.json"))
         
         return results
-    def analyze_all(self):
+    def _run_analyzer(self, analyzer, name):
+        if self.stream_results:
+            results_file = os.path.join(self.output_dir, f"{name}_analysis.jsonl")
+            with AnalysisStreamWriter(results_file) as writer:
+                return analyzer.analyze_video(writer)
+        results = analyzer.analyze_video()
+        with analyzer.metrics.stage('write_results'):
+            self._save_results(analyzer, results, name)
+        return results
+    def _run_chunked(self, analyzer, video_path, name):
+        from concurrent.futures import ProcessPoolExecutor
+        from video_analysis import merge_chunk_results, split_frame_ranges
+        if not analyzer.supports_chunking():
+            raise ValueError("--chunks needs --sampling all, --tracking-mode detect, "
+                             "no --roi-search and no --track-circles")
+        ranges = split_frame_ranges(analyzer.frame_count(), self.chunks)
+        analyzer.cap.release()
+        threads = max(1, (os.cpu_count() or 1) // len(ranges))
+        with analyzer.metrics.stage('chunks'):
+            with ProcessPoolExecutor(max_workers=len(ranges), initializer=_init_worker, initargs=(threads,)) as pool:
+                futures = [pool.submit(_analyze_chunk_job, video_path, self.analyzer_options, start, end,
+                                       analyzer.metrics.enabled)
+                           for start, end in ranges]
+                parts = []
+                for future in futures:
+                    part, metrics_state = future.result()
+                    parts.append(part)
+                    if metrics_state is not None:
+                        # Parçaların aşama süreleri ve frame gecikmeleri bu videonun ölçümlerine eklenir
+                        analyzer.metrics.merge(metrics_state)
+                results = merge_chunk_results(parts)
+        analyzer.metrics.count('chunks', len(ranges))
+        with analyzer.metrics.stage('write_results'):
+            self._save_results(analyzer, results, name)
+        return results
+    def _save_results(self, analyzer, results, name):
+        if self.stream_results:
+            write_analysis_jsonl(results, os.path.join(self.output_dir, f"{name}_analysis.jsonl"))
+        elif self.results_format in ('npz', 'npy'):
+            suffix = '.npz' if self.results_format == 'npz' else ''
+            save_columnar(results, os.path.join(self.output_dir, f"{name}_analysis{suffix}"))
+        else:
+            results_file = os.path.join(self.output_dir, f"{name}_analysis.json")
+            analyzer.save_analysis_results(results, results_file)
+    def analyze_stream(self, source, pace=False, report_interval=0):
+        # Canlı kaynak: kamera indeksi ("0"), RTSP/HTTP adresi ya da --pace ile oynatılan dosya
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        name = os.path.splitext(os.path.basename(source))[0] if isinstance(source, str) and os.path.isfile(source) else "live"
+        from video_analysis import VideoAnalyzer
+        print(f"Streaming: {source}")
+        analyzer = VideoAnalyzer(source, **self.analyzer_options)
+        frame_count = 0
+        results_file = os.path.join(self.output_dir, f"{name}_analysis.jsonl")
+        report_file = os.path.join(self.output_dir, f"{name}_report.txt")
+        with AnalysisStreamWriter(results_file) as writer:
+            video_info = analyzer.get_video_info()
+            self.decision_maker.start_stream(fps=video_info['fps'])
+            writer.write_header(video_info)
+            try:
+                for circle_entry, movement in analyzer.stream(pace=pace):
+                    writer.write_frame(circle_entry, movement)
+                    frame_count += 1
+                    decision = self.decision_maker.decide_frame(circle_entry, movement)
+                    if decision is not None:
+                        print(f"  frame {decision['frame']}: {decision['decision']} ({decision['quality']:.1f})")
+                    if report_interval and frame_count % report_interval == 0:
+                        # Akış sürerken ara rapor: istatistikler artımlı, geçmiş gerekmez
+                        self.decision_maker.generate_decision_report(self.decision_maker.stream_summary(), report_file)
+            except KeyboardInterrupt:
+                print("Stream stopped")
+            video_info['total_frames'] = frame_count
+            writer.write_footer(video_info)
+        
+        summary = self.decision_maker.stream_summary()
+        self.decision_maker.generate_decision_report(summary, report_file)
+        return summary
+    def analyze_video_timed(self, video_path):
+        start = time.perf_counter()
+        entry = {'video': os.path.basename(video_path), 'frames': 0, 'seconds': 0.0, 'fps': 0.0, 'error': None}
+        try:
+            results = self.analyze_video(video_path)
+            entry['frames'] = results['video_info']['total_frames']
+        except Exception as e:
+            entry['error'] = f"{type(e).__name__}: {e}"
+        entry['seconds'] = time.perf_counter() - start
+        if entry['seconds'] > 0:
+            entry['fps'] = entry['frames'] / entry['seconds']
+        return entry
+    def worker_options(self):
+        return {'analyzer_options': self.analyzer_options, 'stream_results': self.stream_results,
+                'results_format': self.results_format, 'decision_engine': self.decision_engine,
+                'cache_dir': self.cache_dir, 'cache_max_bytes': self.cache_max_bytes,
+                'invalidate_cache': self.invalidate_cache, 'profile': self.profile, 'chunks': self.chunks}
+    def analyze_all(self, workers=1):
         videos = self.find_videos()
         print(f"Found {len(videos)} videos")
-        for video in videos:
-            try:
-                self.analyze_video(video)
-                print(f"✓ Done: {os.path.basename(video)}")
-            except Exception as e:
-                print(f"✗ Error: {e}")
+        batch_start = time.perf_counter()
+        if workers > 1 and len(videos) > 1:
+            summary = self._analyze_parallel(videos, workers)
+        else:
+            summary = []
+            for video in videos:
+                entry = self.analyze_video_timed(video)
+                self._print_status(entry)
+                summary.append(entry)
+        self.print_batch_summary(summary, time.perf_counter() - batch_start)
+        return summary
+    def _analyze_parallel(self, videos, workers):
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        summary = [None] * len(videos)
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = {
+                pool.submit(_analyze_video_job, self.videos_dir, self.output_dir, self.worker_options(), video): i
+                for i, video in enumerate(videos)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # Worker süreci çöktü (ör. bellek), diğer videoları etkilemesin
+                    entry = {'video': os.path.basename(videos[i]), 'frames': 0, 'seconds': 0.0,
+                             'fps': 0.0, 'error': f"{type(e).__name__}: {e}"}
+                self._print_status(entry)
+                summary[i] = entry
+        return summary
+    def _print_status(self, entry):
+        if entry['error']:
+            print(f"✗ Error: {entry['video']}: {entry['error']}")
+        else:
+            print(f"✓ Done: {entry['video']}")
+    def print_batch_summary(self, summary, wall_time):
+        print("")
+        print("BATCH SUMMARY")
+        print("=" * 55)
+        for entry in summary:
+            status = "FAILED" if entry['error'] else "ok"
+            print(f"  {entry['video']:<24} {status:<6} {entry['frames']:>7} frames "
+                  f"{entry['seconds']:>8.2f}s {entry['fps']:>7.1f} fps")
+        total_frames = sum(entry['frames'] for entry in summary)
+        failed = sum(1 for entry in summary if entry['error'])
+        print("-" * 55)
+        print(f"  {len(summary) - failed}/{len(summary)} videos, {total_frames} frames in {wall_time:.2f}s "
+              f"({total_frames / wall_time if wall_time > 0 else 0.0:.1f} fps overall)")
+def _init_worker(threads):
+    # OpenCV'nin kendi thread havuzu worker sayısıyla çarpılıp çekirdekleri aşmasın
+    import cv2
+    cv2.setNumThreads(threads)
+ANALYSIS_SUFFIXES = ('_analysis.json', '_analysis.jsonl', '_analysis.npz')
+def find_analysis_files(paths):
+    # Klasörlerde *_analysis.json/.jsonl/.npz dosyaları ve *_analysis (.npy) klasörleri aranır
+    found = []
+    for path in paths:
+        path = os.path.normpath(path)
+        if not os.path.exists(path):
+            print(f"Not found: {path}")
+        elif os.path.isdir(path) and not os.path.exists(os.path.join(path, 'video_info.json')):
+            for file in sorted(os.listdir(path)):
+                full = os.path.join(path, file)
+                if file.endswith(ANALYSIS_SUFFIXES) or (file.endswith('_analysis') and os.path.isdir(full)):
+                    found.append(full)
+        else:
+            found.append(path)
+    return found
+def load_analysis(path):
+    if path.endswith('.jsonl'):
+        return load_analysis_jsonl(path)
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)
+    # .npz dosyası ya da .npy klasörü
+    return load_columnar(path)
+def regenerate_reports(paths, output_dir=None, decision_engine='loop'):
+    # Kayıtlı analizlerden *_report.txt dosyalarını videoyu açmadan yeniden üret
+    reports = []
+    for path in find_analysis_files(paths):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name.endswith('_analysis'):
+            name = name[:-len('_analysis')]
+        report_dir = output_dir or os.path.dirname(path) or '.'
+        os.makedirs(report_dir, exist_ok=True)
+        analysis = load_analysis(path)
+        decision_maker = DecisionMaker(engine=decision_engine)
+        report_file = os.path.join(report_dir, f"{name}_report.txt")
+        decision_maker.generate_decision_report(decision_maker.analyze_decision_patterns(analysis), report_file)
+        if hasattr(analysis, 'close'):
+            analysis.close()
+        print(f"Report: {report_file}")
+        reports.append(report_file)
+    return reports
+def _analyze_chunk_job(video_path, analyzer_options, start, end, profile=False):
+    from video_analysis import VideoAnalyzer
+    # Parça sonuçları ana sürece döndüğü için geçmiş her zaman tutulur
+    options = dict(analyzer_options, keep_history=True, pipeline_workers=0)
+    metrics = Metrics() if profile else NULL_METRICS
+    part = VideoAnalyzer(video_path, metrics=metrics, **options).analyze_chunk(start, end)
+    return part, metrics.state() if profile else None
+def _analyze_video_job(videos_dir, output_dir, options, video_path):
+    # Her worker kendi VideoAnalyzer/DecisionMaker örneğini kullanır
+    system = ROVAnalysisSystem(videos_dir, output_dir, announce=False, **options)
+    return system.analyze_video_timed(video_path)
 def main():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--videos-dir', default='videos')
     parser.add_argument('--output', default='results')
     parser.add_argument('--single-video')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to analyse videos in parallel')
+    parser.add_argument('--chunks', type=int, default=1,
+                        help='split each video into this many frame ranges analysed in separate processes')
+    parser.add_argument('--pipeline-workers', type=int, default=0,
+                        help='detector threads per video (0 = analyse frames sequentially)')
+    parser.add_argument('--tracking-mode', choices=['detect', 'persistent'], default='detect',
+                        help="'persistent' keeps LK tracks alive between frames instead of re-detecting corners")
+    parser.add_argument('--detection-scale', type=float, default=1.0,
+                        help='run Hough circle detection on a frame downscaled by this factor')
+    parser.add_argument('--min-radius', type=int, default=0)
+    parser.add_argument('--max-radius', type=int, default=0)
+    parser.add_argument('--roi-search', action='store_true',
+                        help="search for circles only around the previous frame's detections")
+    parser.add_argument('--full-search-interval', type=int, default=10)
+    parser.add_argument('--yellow-mask-scale', type=float, default=1.0,
+                        help='extract the yellow mask and its contours on a frame downscaled by this factor')
+    parser.add_argument('--yellow-hsv-lower', type=int, nargs=3, default=[20, 100, 100], metavar=('H', 'S', 'V'))
+    parser.add_argument('--yellow-hsv-upper', type=int, nargs=3, default=[30, 255, 255], metavar=('H', 'S', 'V'))
+    parser.add_argument('--yellow-min-area', type=int, default=100,
+                        help='smallest yellow contour area in full-resolution pixels')
+    parser.add_argument('--track-circles', action='store_true',
+                        help='link circles across frames and add track IDs and velocities to the results')
+    parser.add_argument('--sampling', choices=['all', 'stride', 'rate', 'adaptive'], default='all',
+                        help='which frames to decode and analyse; skipped frames are only grabbed')
+    parser.add_argument('--sample-stride', type=int, default=2)
+    parser.add_argument('--sample-rate', type=float, default=5.0, help="analysed frames per second for 'rate'")
+    parser.add_argument('--max-skip', type=int, default=8, help="longest run of skipped frames for 'adaptive'")
+    parser.add_argument('--stream', action='store_true',
+                        help='write per-frame results incrementally to *_analysis.jsonl')
+    parser.add_argument('--bounded-memory', action='store_true',
+                        help='keep no per-frame history in the analyzer (implies --stream)')
+    parser.add_argument('--results-format', choices=['json', 'npz', 'npy'], default='json',
+                        help="'npz'/'npy' store per-frame data as NumPy columns (npy: memory-mappable directory)")
+    parser.add_argument('--decision-engine', choices=['loop', 'vectorized'], default='loop')
+    parser.add_argument('--live', metavar='SOURCE',
+                        help='analyse a live source (camera index, RTSP URL or file) and decide per frame')
+    parser.add_argument('--pace', action='store_true', help='with --live, read a file at its native fps')
+    parser.add_argument('--report-interval', type=int, default=0,
+                        help='with --live, rewrite the report every N frames')
+    parser.add_argument('--cache-dir', help='reuse analyses of unchanged videos from this directory')
+    parser.add_argument('--cache-max-mb', type=float, default=1024,
+                        help='evict least recently used cache entries beyond this size')
+    parser.add_argument('--invalidate-cache', action='store_true',
+                        help='drop cached analyses for the processed videos and re-analyse them')
+    parser.add_argument('--profile', action='store_true',
+                        help='write per-stage timings and throughput to *_metrics.json next to each report')
+    subcommands = parser.add_subparsers(dest='command')
+    report_parser = subcommands.add_parser('report', help='rebuild *_report.txt from saved analysis files')
+    report_parser.add_argument('paths', nargs='*', default=['results'],
+                               help='analysis files (.json, .jsonl, .npz, .npy directory) or directories of them')
+    report_parser.add_argument('--output', dest='report_output',
+                               help='write reports here instead of next to each analysis file')
+    report_parser.add_argument('--decision-engine', dest='report_engine', choices=['loop', 'vectorized'],
+                               default='loop')
     args = parser.parse_args()
     
-    system = ROVAnalysisSystem(args.videos_dir, args.output)
+    if args.command == 'report':
+        reports = regenerate_reports(args.paths, args.report_output, args.report_engine)
+        if not reports:
+            print("No analysis files found")
+            sys.exit(1)
+        return
+    
+    if (args.stream or args.bounded_memory) and args.results_format != 'json':
+        parser.error('--stream/--bounded-memory always write JSONL; drop --results-format')
+    if args.bounded_memory and (args.cache_dir or args.chunks > 1):
+        parser.error('--bounded-memory cannot be combined with --cache-dir or --chunks')
+    if args.chunks > 1 and args.workers > 1:
+        parser.error('--chunks cannot be combined with --workers')
+    if args.chunks > 1 and args.live:
+        parser.error('--chunks cannot be used with --live')
+    if args.pipeline_workers > 0 and args.roi_search:
+        parser.error('--roi-search needs sequential analysis; drop --pipeline-workers')
+    if args.pipeline_workers > 0 and args.sampling == 'adaptive':
+        parser.error('--sampling adaptive needs sequential analysis; drop --pipeline-workers')
+    if args.chunks > 1 and (args.sampling != 'all' or args.tracking_mode != 'detect'
+                            or args.roi_search or args.track_circles):
+        parser.error('--chunks needs --sampling all, --tracking-mode detect, no --roi-search and no --track-circles')
+    
+    analyzer_options = {
+        'pipeline_workers': args.pipeline_workers,
+        'tracking_mode': args.tracking_mode,
+        'detection_scale': args.detection_scale,
+        'min_radius': args.min_radius,
+        'max_radius': args.max_radius,
+        'roi_search': args.roi_search,
+        'full_search_interval': args.full_search_interval,
+        'track_circles': args.track_circles,
+        'yellow_mask_scale': args.yellow_mask_scale,
+        'yellow_hsv_lower': tuple(args.yellow_hsv_lower),
+        'yellow_hsv_upper': tuple(args.yellow_hsv_upper),
+        'yellow_min_area': args.yellow_min_area,
+        'sampling': args.sampling,
+        'sample_stride': args.sample_stride,
+        'sample_rate': args.sample_rate,
+        'max_skip': args.max_skip,
+        'keep_history': not args.bounded_memory,
+    }
+    system = ROVAnalysisSystem(args.videos_dir, args.output, analyzer_options=analyzer_options,
+                               stream_results=args.stream or args.bounded_memory,
+                               results_format=args.results_format,
+                               decision_engine=args.decision_engine,
+                               cache_dir=args.cache_dir,
+                               cache_max_bytes=int(args.cache_max_mb * (1 << 20)),
+                               invalidate_cache=args.invalidate_cache,
+                               profile=args.profile,
+                               chunks=args.chunks)
     
-    if args.single_video:
+    if args.live:
+        system.analyze_stream(args.live, pace=args.pace, report_interval=args.report_interval)
+    elif args.single_video:
         system.analyze_video(args.single_video)
     else:
-        system.analyze_all()
+        system.analyze_all(workers=args.workers)
 if __name__ == "__main__":
     main()
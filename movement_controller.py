@@ -1,10 +1,27 @@
+import threading
+import time
+from collections import deque
+
+from circle_tracker import select_target_track
+from instrumentation import percentile
 from rov_path_planner import ROVPathPlanner, Position, Orientation
 
 class MovementController:
     
-    def __init__(self):
+    def __init__(self, history_size=1000):
         self.path_planner = ROVPathPlanner()
-        self.movement_history = []
+        # Sabit boyutlu halka tampon; toplam komut sayısı ayrıca tutulur
+        self.movement_history = deque(maxlen=history_size)
+        self.command_count = 0
+        
+        # Önceden hesaplanmış yörünge takibi
+        self.trajectory = None
+        self.trajectory_index = 0
+        self.trajectory_start = None
+        self.replan_count = 0
+        
+        # Hedeflenen çemberin track ID'si (kaybolana kadar aynı çembere bağlı kalınır)
+        self.target_track_id = None
     
     def set_current_state(self, position, orientation):
         """Mevcut durum güncelle"""
@@ -17,6 +34,7 @@ class MovementController:
         
         # Hareket geçmişine ekle
         self.movement_history.append(motor_commands)
+        self.command_count += 1
         
         return motor_commands
     
@@ -25,12 +43,59 @@ class MovementController:
         movements = self.path_planner.plan_circle_approach(center, radius)
         return self.path_planner.generate_motor_commands(movements)
     
+    def follow_circular_path(self, center, radius=100, replan_tolerance=5.0, elapsed=None, **trajectory_options):
+        """Çember etrafındaki yörüngede bir kontrol adımı ilerle.
+        
+        Yörünge yalnızca çember replan_tolerance'tan fazla kaydığında yeniden
+        hesaplanır; aksi halde sıradaki yol noktası O(1) ile alınır. elapsed
+        (saniye) verilirse yol noktası zamana göre seçilir.
+        """
+        if self.trajectory is None or self.trajectory.needs_replan(center, radius, replan_tolerance):
+            self.trajectory = self.path_planner.generate_circular_trajectory(center, radius, **trajectory_options)
+            self.trajectory_index = 0
+            self.trajectory_start = elapsed
+            self.replan_count += 1
+        
+        if elapsed is not None:
+            index = self.trajectory.index_at(elapsed - (self.trajectory_start or 0))
+        else:
+            index = self.trajectory_index
+            self.trajectory_index += 1
+        
+        position, orientation = self.trajectory.waypoint(index)
+        self.path_planner.set_target_state(position, orientation)
+        return self.calculate_movement_vector()
+    
+    def approach_tracked_circle(self, tracks, approach_distance=50, yellow_only=True, lead_frames=0):
+        """Sonuçlardaki 'tracks' listesinden kalıcı bir çembere yaklaşma komutları.
+        
+        Hedef track görüldükçe ona bağlı kalınır; lead_frames > 0 ise track'in
+        hızıyla ileriye tahmin edilen konuma gidilir. Hedef yoksa None döner.
+        """
+        target = select_target_track(tracks, self.target_track_id, yellow_only)
+        if target is None:
+            self.target_track_id = None
+            return None
+        self.target_track_id = target['id']
+        center = (target['x'] + target['vx'] * lead_frames, target['y'] + target['vy'] * lead_frames)
+        return self.calculate_circle_approach_strategy(center, approach_distance)
+    
+    def calculate_circle_approach_batch(self, centers, radius):
+        """Mevcut durumdan birçok çember merkezine yaklaşma komutları (M, 6)"""
+        position = self.path_planner.current_position
+        orientation = self.path_planner.current_orientation
+        _, motor_commands = self.path_planner.plan_circle_approach_batch(
+            (position.x, position.y, position.z),
+            (orientation.roll, orientation.pitch, orientation.yaw),
+            centers, radius)
+        return motor_commands
+    
     def get_movement_summary(self):
         """Hareket özeti"""
         path_summary = self.path_planner.get_path_summary()
         
         # Verimlilik hesapla
-        total_commands = len(self.movement_history)
+        total_commands = self.command_count
         efficiency = 0.8 if total_commands > 0 else 0.0
         
         return {
@@ -38,3 +103,150 @@ class MovementController:
             'total_commands': total_commands,
             'efficiency_metrics': {'efficiency': efficiency}
         }
+
+class ControlLoop:
+    """MovementController'ı sabit frekansta (ör. 50 Hz) çalıştıran zamanlayıcı.
+    
+    Görüntü tarafı update_state ile en son durumu bloklamadan bırakır; her
+    adımda yalnızca en yeni durum kullanılır. Motor komutları on_commands
+    geri çağrısıyla yayınlanır. step verilmezse calculate_movement_vector
+    çalıştırılır.
+    """
+    def __init__(self, controller, rate_hz=50, on_commands=None, step=None, stats_size=1000):
+        self.controller = controller
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.on_commands = on_commands
+        self.step = step or (lambda controller: controller.calculate_movement_vector())
+        
+        self._latest_state = None
+        self._state_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        # İstatistikler döngü çalışırken de okunabilsin diye eklemeler kilit altında yapılır
+        self._stats_lock = threading.Lock()
+        self.jitter = deque(maxlen=stats_size)
+        self.tick_durations = deque(maxlen=stats_size)
+    
+    def update_state(self, position, orientation):
+        """En son ölçülen durumu bırak (bloklamaz, eski durumun üzerine yazar)"""
+        with self._state_lock:
+            self._latest_state = (position, orientation)
+    
+    def tick(self):
+        """Tek bir kontrol adımı: en yeni durumu al, planla, komutları yayınla"""
+        with self._state_lock:
+            state, self._latest_state = self._latest_state, None
+        if state is not None:
+            self.controller.set_current_state(*state)
+        commands = self.step(self.controller)
+        self.ticks += 1
+        if self.on_commands is not None:
+            self.on_commands(commands)
+        return commands
+    
+    def run(self, ticks=None, duration=None):
+        """Döngüyü bu thread'de çalıştır; ticks/duration dolunca ya da stop() ile biter"""
+        start = time.perf_counter()
+        deadline = start + duration if duration is not None else None
+        scheduled = start
+        count = 0
+        while not self._stop.is_set():
+            if ticks is not None and count >= ticks:
+                break
+            if deadline is not None and scheduled >= deadline:
+                break
+            
+            now = time.perf_counter()
+            self.tick()
+            finished = time.perf_counter()
+            count += 1
+            
+            scheduled_tick = scheduled
+            scheduled += self.period
+            with self._stats_lock:
+                self.jitter.append(now - scheduled_tick)
+                self.tick_durations.append(finished - now)
+                if finished > scheduled:
+                    # Süre aşımı: kaçırılan adımları telafi etmeye çalışmadan takvime dön
+                    self.overruns += 1
+                    missed = int((finished - scheduled) / self.period) + 1
+                    self.missed_ticks += missed - 1
+                    scheduled += missed * self.period
+            self._stop.wait(max(0.0, scheduled - time.perf_counter()))
+    
+    def start(self):
+        """Döngüyü arka plan thread'inde başlat"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def stats(self):
+        """Zamanlama istatistikleri (milisaniye); döngü çalışırken de çağrılabilir"""
+        with self._stats_lock:
+            jitter = [abs(j) for j in self.jitter]
+            durations = list(self.tick_durations)
+            ticks, overruns, missed_ticks = self.ticks, self.overruns, self.missed_ticks
+        jitter.sort()
+        durations.sort()
+        return {
+            'rate_hz': self.rate_hz,
+            'ticks': ticks,
+            'overruns': overruns,
+            'missed_ticks': missed_ticks,
+            'jitter_ms': {
+                'mean': sum(jitter) / len(jitter) * 1000 if jitter else 0.0,
+                'p95': percentile(jitter, 95) * 1000,
+                'max': jitter[-1] * 1000 if jitter else 0.0
+            },
+            'tick_ms': {
+                'mean': sum(durations) / len(durations) * 1000 if durations else 0.0,
+                'p95': percentile(durations, 95) * 1000,
+                'max': durations[-1] * 1000 if durations else 0.0
+            }
+        }
+
+class SimulatedPlant:
+    """Çevrimdışı test için basit ROV modeli.
+    
+    Motor komutları (-1..+1) tam güçteki hız ve dönüş hızlarıyla ölçeklenip
+    dt boyunca entegre edilir; hareket dünya eksenlerindedir (planlayıcı gibi).
+    """
+    def __init__(self, position=None, orientation=None, max_speed=50.0, max_turn_rate=90.0):
+        self.position = position or Position()
+        self.orientation = orientation or Orientation()
+        self.max_speed = max_speed
+        self.max_turn_rate = max_turn_rate
+    
+    def apply(self, commands, dt):
+        """Komutları dt saniye uygula ve yeni (Position, Orientation) döndür"""
+        speed = self.max_speed * dt
+        turn = self.max_turn_rate * dt
+        self.position = Position(
+            self.position.x + commands['forward_thruster'] * speed,
+            self.position.y + commands['sideways_thruster'] * speed,
+            self.position.z + commands['vertical_thruster'] * speed
+        )
+        self.orientation = Orientation(
+            self.orientation.roll + commands['roll_motor'] * turn,
+            self.orientation.pitch + commands['pitch_motor'] * turn,
+            self.orientation.yaw + commands['yaw_motor'] * turn
+        )
+        return self.position, self.orientation
@@ -0,0 +1,207 @@
+import itertools
+import json
+import time
+import numpy as np
+from video_analysis import VideoAnalyzer
+from decision_maker import DecisionMaker
+
+# Sweep'in frame döngüsünde ayar başına uygulanabilen detector seçenekleri. Hareket
+# takibi, örnekleme ve pipeline tek okuyucu tarafından tüm ayarlar için ortak yapıldığı
+# için ızgarada değiştirilemez.
+SWEEP_DETECTOR_OPTIONS = frozenset({
+    'detection_scale', 'min_radius', 'max_radius', 'hough_min_dist', 'hough_param1', 'hough_param2',
+    'hough_blur', 'roi_search', 'full_search_interval', 'roi_margin',
+    'track_circles', 'track_max_distance', 'track_max_missed',
+    'yellow_hsv_lower', 'yellow_hsv_upper', 'yellow_min_area', 'yellow_mask_scale'
+})
+
+
+def expand_grid(grid):
+    """{'parametre': [değerler], ...} ızgarasını kombinasyon sözlüklerine aç"""
+    if not grid:
+        return [{}]
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_sweep(video_path, detector_grid=None, decision_grid=None, base_options=None, max_frames=None):
+    """Videoyu bir kez decode edip tüm detector x karar eşiği kombinasyonlarını değerlendir.
+
+    Her frame'in gri/HSV/küçültülmüş görüntüleri PreparedFrame'de bir kez
+    hesaplanıp tüm detector ayarlarınca paylaşılır; optik akış da detector
+    ayarlarından bağımsız olduğu için frame başına bir kez ölçülür. Örnekleme
+    kullanılmaz, her frame analiz edilir. detector_grid sadece
+    SWEEP_DETECTOR_OPTIONS anahtarlarını alabilir; diğerleri ValueError verir.
+    Çember takibi ve ROI durumu her ayar için ayrı tutulur.
+
+    Paylaşılan dönüşümler detector döngüsünden önce hesaplanır ve süreleri
+    shared_ms_per_frame olarak ayrı raporlanır; detect_ms_per_frame sadece
+    her ayarın kendi işini (blur, Hough, maske, kontürler) ölçer.
+    """
+    unsupported = sorted(set(detector_grid or {}) - SWEEP_DETECTOR_OPTIONS)
+    if unsupported:
+        raise ValueError(f"Parameter sweep cannot vary: {', '.join(unsupported)}")
+    base_options = dict(base_options or {}, sampling='all', pipeline_workers=0)
+    detector_configs = expand_grid(detector_grid)
+    decision_configs = expand_grid(decision_grid)
+
+    reader = VideoAnalyzer(video_path, **base_options)
+    analyzers = [VideoAnalyzer(video_path, **dict(base_options, **config)) for config in detector_configs]
+    circle_data = [[] for _ in analyzers]
+    detect_seconds = [0.0] * len(analyzers)
+    shared_seconds = 0.0
+    detection_scales = sorted({analyzer.detection_scale for analyzer in analyzers})
+    mask_scales = sorted({analyzer.yellow_mask_scale for analyzer in analyzers})
+    movement_data = []
+    prev_gray = None
+
+    start = time.perf_counter()
+    for frame_count, prepared in reader.read_frames():
+        if max_frames is not None and frame_count >= max_frames:
+            break
+        height, width = prepared.frame.shape[:2]
+        shared_start = time.perf_counter()
+        for scale in detection_scales:
+            prepared.scaled_gray(scale)
+        for scale in mask_scales:
+            prepared.scaled_hsv(scale)
+        shared_seconds += time.perf_counter() - shared_start
+        for index, analyzer in enumerate(analyzers):
+            detect_start = time.perf_counter()
+            rois = analyzer.circle_search_rois(frame_count, width, height)
+            circles, yellow_circles = analyzer.detect_frame(prepared, rois)
+            analyzer._last_circles = circles
+            circle_entry = {
+                'frame': frame_count,
+                'circles_count': len(circles),
+                'circles': circles,
+                'yellow_circles': yellow_circles
+            }
+            if analyzer.circle_tracker is not None:
+                # iter_frame_results ile aynı: sonraki frame'in ROI'leri track tahminlerinden kurulur
+                tracks = analyzer.circle_tracker.update(circles, yellow_circles, frame_count)
+                circle_entry['tracks'] = [track.to_entry() for track in tracks]
+            detect_seconds[index] += time.perf_counter() - detect_start
+            circle_data[index].append(circle_entry)
+        if prev_gray is not None:
+            movement = reader.track_movement(prepared, prev_gray)
+            movement['frame'] = frame_count
+            movement_data.append(movement)
+        prev_gray = prepared.gray
+    reader.cap.release()
+    elapsed = time.perf_counter() - start
+
+    frames = len(circle_data[0])
+    rows = []
+    reference = None
+    for detector_config, entries, seconds in zip(detector_configs, circle_data, detect_seconds):
+        video_data = {'movement_data': movement_data, 'circle_detection_data': entries}
+        for decision_config in decision_configs:
+            maker = DecisionMaker(engine='vectorized', thresholds=decision_config)
+            result = maker.analyze_decision_patterns(video_data)
+            codes = result.get('decision_codes', np.zeros(0, dtype=np.int8))
+            if reference is None:
+                reference = codes
+            rows.append({
+                'detector': detector_config,
+                'decision': decision_config,
+                'frames': len(entries),
+                'circles_detected': sum(entry['circles_count'] for entry in entries),
+                'yellow_frames': sum(1 for entry in entries if entry['yellow_circles']),
+                'detect_ms_per_frame': seconds / max(len(entries), 1) * 1000,
+                'decision_accuracy': result['decision_accuracy'],
+                'decision_counts': result.get('decision_counts', {}),
+                # İlk satırın (referans) kararlarıyla aynı karar verilen frame oranı
+                'agreement': float(np.mean(codes == reference)) if len(codes) else 1.0
+            })
+    return {
+        'video': video_path,
+        'frames': frames,
+        'seconds': elapsed,
+        'shared_ms_per_frame': shared_seconds / max(frames, 1) * 1000,
+        'configurations': len(rows),
+        'rows': rows
+    }
+
+
+def _label(config):
+    if not config:
+        return 'default'
+    return ' '.join(f"{name}={_format_value(value)}" for name, value in config.items())
+
+
+def _format_value(value):
+    if isinstance(value, (tuple, list)):
+        return ':'.join(str(v) for v in value)
+    return str(value)
+
+
+def format_table(sweep):
+    """Sweep sonucunu tek bir karşılaştırma tablosu olarak biçimlendir"""
+    header = (f"{'detector':<36} {'decision':<32} {'circles':>8} {'yellow':>7} "
+              f"{'ms/frame':>9} {'accuracy':>9} {'agree':>7}  decisions")
+    lines = [f"Parameter sweep: {sweep['video']} ({sweep['frames']} frames, "
+             f"{sweep['configurations']} configurations, {sweep['seconds']:.2f}s, "
+             f"shared preprocessing {sweep['shared_ms_per_frame']:.2f} ms/frame)", header, '-' * len(header)]
+    for row in sweep['rows']:
+        counts = ' '.join(f"{name}={count}" for name, count in row['decision_counts'].items())
+        lines.append(f"{_label(row['detector']):<36} {_label(row['decision']):<32} "
+                     f"{row['circles_detected']:>8} {row['yellow_frames']:>7} "
+                     f"{row['detect_ms_per_frame']:>9.2f} {row['decision_accuracy']:>9.2%} "
+                     f"{row['agreement']:>7.1%}  {counts}")
+    return '\n'.join(lines)
+
+
+def parse_grid(specs):
+    """['hough_param2=60,80', 'yellow_hsv_lower=20:100:100'] -> {'hough_param2': [60, 80], ...}"""
+    grid = {}
+    for spec in specs or []:
+        name, _, values = spec.partition('=')
+        grid[name] = [_parse_value(value) for value in values.split(',')]
+    return grid
+
+
+def _parse_value(text):
+    if ':' in text:
+        return tuple(_parse_value(part) for part in text.split(':'))
+    if text.lower() in ('true', 'false'):
+        # roi_search=true,false gibi bayraklar
+        return text.lower() == 'true'
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Evaluate detector and decision settings on one decode of a video')
+    parser.add_argument('video')
+    parser.add_argument('--detector', action='append', metavar='NAME=V1,V2',
+                        help="VideoAnalyzer option values, e.g. hough_param2=60,80 (tuples as 20:100:100)")
+    parser.add_argument('--decision', action='append', metavar='NAME=V1,V2',
+                        help="DecisionMaker threshold values, e.g. stop_velocity=0.2,0.3")
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--output', help='also write the table to this file')
+    parser.add_argument('--json', help='write the raw sweep results to this file')
+    args = parser.parse_args()
+
+    try:
+        sweep = run_sweep(args.video, parse_grid(args.detector), parse_grid(args.decision),
+                          max_frames=args.max_frames)
+    except ValueError as e:
+        parser.error(str(e))
+    table = format_table(sweep)
+    print(table)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(table + '\n')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(sweep, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+from analysis_io import to_builtin
+
+
+def video_fingerprint(video_path, sample_size=1 << 20):
+    """Videonun hızlı parmak izi: boyut + baş, orta ve sondan alınan örneklerin özeti.
+
+    Tüm dosyayı okumadan içerik değişikliğini yakalar; dosyanın adı ya da
+    konumu değişse de aynı video aynı parmak izini verir.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    with open(video_path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)}):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Video analiz sonuçları için boyutu sınırlı disk önbelleği.
+
+    Anahtar, video parmak izi ile detector parametrelerinden oluşur. Toplam
+    boyut max_bytes'ı aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, video_path, parameters):
+        encoded = json.dumps(parameters, sort_keys=True, default=to_builtin)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(video_fingerprint(video_path).encode())
+        digest.update(encoded.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                results = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Son kullanım zamanını güncelle (LRU silme sırası için)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return results
+
+    def put(self, key, results):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(results, f, default=to_builtin)
+        # Paralel worker'lar yarım dosya görmesin
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def invalidate(self, key=None):
+        """Tek bir kaydı ya da key verilmezse tüm önbelleği sil"""
+        paths = [self._path(key)] if key is not None else self._entries()
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _entries(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith('.json')]
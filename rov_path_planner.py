@@ -1,7 +1,17 @@
 import math
+# numpy sadece toplu ve yörünge API'lerinde, ilk kullanımda yüklenir
+
+# Toplu API'de hareket ve motor komutu dizilerinin sütun sırası
+MOVEMENT_KEYS = ('forward_movement', 'sideways_movement', 'vertical_movement',
+                 'roll_adjustment', 'pitch_adjustment', 'yaw_adjustment')
+MOTOR_KEYS = ('forward_thruster', 'sideways_thruster', 'vertical_thruster',
+              'roll_motor', 'pitch_motor', 'yaw_motor')
+# Hareket -> motor gücü bölenleri (generate_motor_commands ile aynı)
+MOTOR_SCALE = (100, 100, 100, 45, 45, 45)
 
 class Position:
     """ROV'un 3B pozisyonu"""
+    __slots__ = ('x', 'y', 'z')
     def __init__(self, x=0, y=0, z=0):
         self.x = x  # x pozisyon
         self.y = y  # y pozisyon  
@@ -9,11 +19,63 @@ class Position:
 
 class Orientation:
     """ROV'un yönelimi"""
+    __slots__ = ('roll', 'pitch', 'yaw')
     def __init__(self, roll=0, pitch=0, yaw=0):
         self.roll = roll    # X ekseni dönüş 
         self.pitch = pitch  # Y ekseni dönüş 
         self.yaw = yaw      # Z ekseni dönüş 
 
+class Trajectory:
+    """Önceden hesaplanmış, zaman parametreli yol noktaları dizisi.
+    
+    Yol noktaları eşit aralıklı olduğundan (dt) zamana ya da kontrol adımına
+    göre arama O(1)'dir; her adımda trigonometri yeniden hesaplanmaz.
+    """
+    def __init__(self, positions, yaws, dt, circle_center, radius, loop=False):
+        import numpy as np
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.yaws = np.asarray(yaws, dtype=np.float64)
+        self.dt = dt
+        self.circle_center = (float(circle_center[0]), float(circle_center[1]))
+        self.radius = radius
+        self.loop = loop
+        # Kontrol döngüsünde numpy skaler yükü olmasın diye düz listeler
+        self._waypoints = [(tuple(p), yaw) for p, yaw in zip(self.positions.tolist(), self.yaws.tolist())]
+    
+    def __len__(self):
+        return len(self._waypoints)
+    
+    @property
+    def times(self):
+        """Her yol noktasına varış zamanı (saniye)"""
+        import numpy as np
+        return np.arange(1, len(self) + 1) * self.dt
+    
+    @property
+    def duration(self):
+        return len(self) * self.dt
+    
+    def index_at(self, elapsed):
+        """Başlangıçtan elapsed saniye sonra hedeflenecek yol noktasının indeksi"""
+        index = int(elapsed / self.dt) if elapsed > 0 else 0
+        return self._clamp(index)
+    
+    def waypoint(self, index):
+        """İndeksteki hedef durumu (Position, Orientation) olarak döndür"""
+        (x, y, z), yaw = self._waypoints[self._clamp(index)]
+        return Position(x, y, z), Orientation(0, 0, yaw)
+    
+    def needs_replan(self, circle_center, radius, tolerance):
+        """Çember tolerance'tan fazla kaydıysa ya da yarıçap değiştiyse True"""
+        return (radius != self.radius or
+                math.hypot(circle_center[0] - self.circle_center[0],
+                           circle_center[1] - self.circle_center[1]) > tolerance)
+    
+    def _clamp(self, index):
+        if self.loop:
+            return index % len(self._waypoints)
+        return min(index, len(self._waypoints) - 1)
+
 class ROVPathPlanner:
     """ROV'un hareket ve yol planlama sistemi"""
     
@@ -121,6 +183,116 @@ class ROVPathPlanner:
         
         return self.calculate_movement_requirements()
     
+    def generate_circular_trajectory(self, circle_center, radius=100, step_degrees=5,
+                                     max_speed=None, max_yaw_rate=None, revolutions=1.0):
+        """Çember etrafındaki yörüngeyi tek seferde yol noktası dizisi olarak üret.
+        
+        İlk yol noktası plan_circular_path'in vereceği hedefle aynıdır. dt, hız
+        (birim/s) ve sapma hızı (derece/s) sınırlarından yavaş olanına göre
+        seçilir; sınır verilmezse her yol noktası bir kontrol adımıdır (dt=1).
+        """
+        import numpy as np
+        circle_x, circle_y = circle_center
+        current_angle = math.atan2(
+            self.current_position.y - circle_y,
+            self.current_position.x - circle_x
+        )
+        count = max(1, int(round(360 * revolutions / step_degrees)))
+        angles = current_angle + np.radians(step_degrees) * np.arange(1, count + 1)
+        
+        positions = np.empty((count, 3))
+        positions[:, 0] = circle_x + radius * np.cos(angles)
+        positions[:, 1] = circle_y + radius * np.sin(angles)
+        positions[:, 2] = self.current_position.z
+        yaws = np.degrees(angles + math.pi/2)
+        
+        dt = self._waypoint_interval(radius * math.radians(step_degrees), step_degrees, max_speed, max_yaw_rate)
+        return Trajectory(positions, yaws, dt, circle_center, radius, loop=revolutions >= 1)
+    
+    def generate_approach_trajectory(self, circle_center, approach_distance=50, step_distance=10,
+                                     max_speed=None):
+        """plan_circle_approach hedefine düz çizgi boyunca yol noktaları üret"""
+        import numpy as np
+        circle_x, circle_y = circle_center
+        angle_to_circle = math.atan2(
+            circle_y - self.current_position.y,
+            circle_x - self.current_position.x
+        )
+        target_x = circle_x - approach_distance * math.cos(angle_to_circle)
+        target_y = circle_y - approach_distance * math.sin(angle_to_circle)
+        distance = math.hypot(target_x - self.current_position.x, target_y - self.current_position.y)
+        count = max(1, int(math.ceil(distance / step_distance)))
+        
+        fractions = np.arange(1, count + 1) / count
+        positions = np.empty((count, 3))
+        positions[:, 0] = self.current_position.x + (target_x - self.current_position.x) * fractions
+        positions[:, 1] = self.current_position.y + (target_y - self.current_position.y) * fractions
+        positions[:, 2] = self.current_position.z
+        yaws = np.full(count, math.degrees(angle_to_circle))
+        
+        dt = self._waypoint_interval(distance / count, 0, max_speed, None)
+        return Trajectory(positions, yaws, dt, circle_center, approach_distance)
+    
+    def _waypoint_interval(self, segment_length, segment_degrees, max_speed, max_yaw_rate):
+        intervals = []
+        if max_speed:
+            intervals.append(segment_length / max_speed)
+        if max_yaw_rate:
+            intervals.append(segment_degrees / max_yaw_rate)
+        interval = max(intervals) if intervals else 1.0
+        return interval if interval > 0 else 1.0
+    
+    def calculate_movement_requirements_batch(self, current_positions, current_orientations,
+                                              target_positions, target_orientations):
+        """calculate_movement_requirements'ın toplu hali.
+        
+        Girdiler (N, 3) dizileridir (x, y, z ve roll, pitch, yaw); numpy yayını
+        desteklenir. MOVEMENT_KEYS sırasında (N, 6) dizi döner.
+        """
+        import numpy as np
+        current_positions, current_orientations, target_positions, target_orientations = np.broadcast_arrays(
+            np.asarray(current_positions, dtype=np.float64), np.asarray(current_orientations, dtype=np.float64),
+            np.asarray(target_positions, dtype=np.float64), np.asarray(target_orientations, dtype=np.float64))
+        movements = np.empty(current_positions.shape[:-1] + (6,))
+        movements[..., :3] = target_positions - current_positions
+        movements[..., 3:] = normalize_angles(target_orientations - current_orientations)
+        return movements
+    
+    def plan_circle_approach_batch(self, current_positions, current_orientations, circle_centers,
+                                   approach_distance=50):
+        """Birçok durum / çember çifti için yaklaşma planı ve motor komutları.
+        
+        current_positions ve current_orientations (N, 3), circle_centers (N, 2);
+        tek bir durum birçok çemberle (ya da tersi) yayınla eşleştirilebilir.
+        plan_circle_approach gibi hedef durumu değiştirmez; (hareketler, motor
+        komutları) olarak iki (N, 6) dizi döner.
+        """
+        import numpy as np
+        positions = np.asarray(current_positions, dtype=np.float64)
+        orientations = np.asarray(current_orientations, dtype=np.float64)
+        centers = np.asarray(circle_centers, dtype=np.float64)
+        shape = np.broadcast_shapes(positions.shape[:-1], orientations.shape[:-1], centers.shape[:-1])
+        positions = np.broadcast_to(positions, shape + (3,))
+        orientations = np.broadcast_to(orientations, shape + (3,))
+        centers = np.broadcast_to(centers, shape + (2,))
+        
+        angle_to_circle = np.arctan2(centers[..., 1] - positions[..., 1], centers[..., 0] - positions[..., 0])
+        target_positions = np.empty(shape + (3,))
+        target_positions[..., 0] = centers[..., 0] - approach_distance * np.cos(angle_to_circle)
+        target_positions[..., 1] = centers[..., 1] - approach_distance * np.sin(angle_to_circle)
+        target_positions[..., 2] = positions[..., 2]
+        target_orientations = np.zeros(shape + (3,))
+        target_orientations[..., 2] = np.degrees(angle_to_circle)
+        
+        movements = self.calculate_movement_requirements_batch(
+            positions, orientations, target_positions, target_orientations)
+        return movements, self.generate_motor_commands_batch(movements)
+    
+    def generate_motor_commands_batch(self, movements):
+        """(N, 6) hareket dizisini -1.0 ile +1.0 arasına kırpılmış motor komutlarına çevir"""
+        import numpy as np
+        return np.clip(np.asarray(movements, dtype=np.float64) / np.asarray(MOTOR_SCALE, dtype=np.float64), -1.0, 1.0)
+    
     def generate_motor_commands(self, movements):
         """Hareket gereksinimlerini motor komutlarına çevir"""
         # Motor gücü -1.0 ile +1.0 arasında
@@ -151,11 +323,25 @@ class ROVPathPlanner:
         }
     
     def _normalize_angle(self, angle):
-        while angle > 180:
-            angle -= 360
-        while angle < -180:
-            angle += 360
+        # Döngüsüz sarma: >180 için (-180, 180], <-180 için [-180, 180) aralığına
+        if angle > 180:
+            return angle - 360 * math.ceil((angle - 180) / 360)
+        if angle < -180:
+            return angle + 360 * math.ceil((-180 - angle) / 360)
         return angle
     
     def _limit_power(self, value):
-        return max(-1.0, min(1.0, value))
\ No newline at end of file
+        return max(-1.0, min(1.0, value))
+
+def normalize_angles(angles):
+    """_normalize_angle'ın dizi hali: döngüsüz, aynı aralık kurallarıyla"""
+    import numpy as np
+    angles = np.asarray(angles, dtype=np.float64)
+    return np.where(angles > 180, angles - 360 * np.ceil((angles - 180) / 360),
+                    np.where(angles < -180, angles + 360 * np.ceil((-180 - angles) / 360), angles))
+
+def states_to_arrays(positions, orientations):
+    """Position/Orientation listelerini toplu API'nin (N, 3) dizilerine çevir"""
+    import numpy as np
+    return (np.array([(p.x, p.y, p.z) for p in positions], dtype=np.float64).reshape(-1, 3),
+            np.array([(o.roll, o.pitch, o.yaw) for o in orientations], dtype=np.float64).reshape(-1, 3))
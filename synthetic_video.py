@@ -0,0 +1,71 @@
+import math
+import cv2
+import numpy as np
+
+
+def generate_synthetic_video(output_path, width=640, height=480, frames=120, fps=25.0, seed=0,
+                             yellow_circles=1, plain_circles=2, pan_speed=2.0, sway=None, shake=1.0):
+    """Gerçek kayıt gerektirmeden ROV benzeri bir test videosu üret.
+
+    Dokulu bir arka plan kamera hareketiyle (sabit yatay kayma + dikey sinüs
+    salınım + titreme) kayar. Sarı dolu çemberler ve düz halka çemberler dünya
+    koordinatlarında sabittir; her türün ilki ilk frame'de görünür, diğerleri
+    kamera yolu boyunca dağıtılır. Kamera kaymaları ve çember konumları
+    karşılaştırma için döndürülür.
+    """
+    rng = np.random.default_rng(seed)
+    if sway is None:
+        sway = height * 0.05
+    pad = int(4 * shake) + 2
+    pan_total = int(math.ceil(pan_speed * max(frames - 1, 0)))
+    world_w = width + pan_total + 2 * pad
+    world_h = height + int(2 * sway) + 2 * pad
+    
+    # Çok ölçekli gürültü: LK için köşe, Hough için düşük kontrastlı doku
+    texture = np.zeros((world_h, world_w), np.float32)
+    for scale in (4, 16, 64):
+        small = rng.random((world_h // scale + 2, world_w // scale + 2)).astype(np.float32)
+        texture += cv2.resize(small, (world_w // scale * scale + 2 * scale, world_h // scale * scale + 2 * scale),
+                              interpolation=cv2.INTER_CUBIC)[:world_h, :world_w]
+    texture = cv2.normalize(texture, None, 30, 140, cv2.NORM_MINMAX)
+    background = cv2.merge([texture * 0.9 + 20, texture * 0.8 + 10, texture * 0.35]).astype(np.uint8)
+    
+    circles = []
+    min_radius = max(8, min(width, height) // 24)
+    max_radius = max(min_radius + 1, min(width, height) // 8)
+    view_x, view_y = pad, pad + int(sway)
+    for kind, count in ((True, yellow_circles), (False, plain_circles)):
+        for i in range(count):
+            radius = int(rng.integers(min_radius, max_radius))
+            span = width if i == 0 else width + pan_total
+            x = view_x + int(rng.integers(radius + 4, max(radius + 5, span - radius - 4)))
+            y = view_y + int(rng.integers(radius + 4, max(radius + 5, height - radius - 4)))
+            circles.append({'center': (x, y), 'radius': radius, 'yellow': kind})
+    for circle in circles:
+        if circle['yellow']:
+            cv2.circle(background, circle['center'], circle['radius'], (0, 220, 255), -1, cv2.LINE_AA)
+        else:
+            cv2.circle(background, circle['center'], circle['radius'], (235, 235, 235), 3, cv2.LINE_AA)
+    
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Cannot open video writer: {output_path}")
+    offsets = []
+    for frame_index in range(frames):
+        ox = view_x + pan_speed * frame_index + rng.normal(0, shake)
+        oy = view_y + sway * math.sin(2 * math.pi * frame_index / max(frames, 1)) + rng.normal(0, shake)
+        ox = int(round(min(max(ox, 0), world_w - width)))
+        oy = int(round(min(max(oy, 0), world_h - height)))
+        writer.write(np.ascontiguousarray(background[oy:oy + height, ox:ox + width]))
+        offsets.append((ox, oy))
+    writer.release()
+    
+    return {
+        'path': output_path,
+        'width': width,
+        'height': height,
+        'frames': frames,
+        'fps': fps,
+        'camera_offsets': offsets,
+        'circles': circles
+    }
@@ -1,9 +1,16 @@
 import os
 import sys
+import json
+import time
+import tempfile
 try:
-    from video_analysis import VideoAnalyzer
+    # Video gerektiren testler VideoAnalyzer'ı kendi içinde içe aktarır; böylece
+    # karar/planlama testleri OpenCV yüklemeden çalışır
     from movement_controller import MovementController, Position, Orientation
-    from decision_maker import DecisionMaker
+    from decision_maker import DecisionMaker, OnlineDecisionStats
+    from result_cache import AnalysisCache
+    from instrumentation import Metrics
+    from analysis_io import AnalysisStreamWriter, load_analysis_jsonl, save_columnar, load_columnar
     print("Modules imported successfully")
 except ImportError as e:
     print(f"Import error: {e}")
@@ -27,14 +34,688 @@ def test_basic():
         print(f"Test failed: {e}")
         return False
 
+def _write_test_video(path, frames=20, width=160, height=120, fps=10):
+    from synthetic_video import generate_synthetic_video
+    generate_synthetic_video(path, width, height, frames, fps=fps)
+    return path
+
+def test_pipeline_matches_sequential():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        sequential = VideoAnalyzer(path).analyze_video()
+        pipelined = VideoAnalyzer(path, pipeline_workers=3, queue_size=2).analyze_video()
+    assert sequential['video_info']['total_frames'] == 20
+    assert pipelined == sequential
+
+def test_pipeline_detector_error_does_not_hang():
+    import threading
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'), frames=3)
+        analyzer = VideoAnalyzer(path, pipeline_workers=1, queue_size=1)
+        
+        def failing_detect(prepared, rois=None):
+            # Decoder'ın EOF'a ulaşıp dolu kuyrukta beklemesine zaman tanı
+            time.sleep(0.3)
+            raise RuntimeError('detector failed')
+        analyzer.detect_frame = failing_detect
+        outcome = {}
+        
+        def run():
+            try:
+                analyzer.analyze_video()
+            except RuntimeError as e:
+                outcome['error'] = str(e)
+        runner = threading.Thread(target=run, daemon=True)
+        runner.start()
+        runner.join(10)
+        assert not runner.is_alive(), 'analyze_video hung after a detector error'
+    assert outcome['error'] == 'detector failed'
+
+def test_persistent_tracking():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        detect = VideoAnalyzer(path).analyze_video()
+        persistent = VideoAnalyzer(path, tracking_mode='persistent', redetect_interval=5).analyze_video()
+    assert [m['frame'] for m in persistent['movement_data']] == [m['frame'] for m in detect['movement_data']]
+    for a, b in zip(detect['movement_data'], persistent['movement_data']):
+        assert set(a) == set(b)
+        assert abs(a['velocity'] - b['velocity']) < 1.0
+    assert DecisionMaker().analyze_decision_patterns(persistent)['total_decisions'] == 19
+
+def test_scaled_roi_circle_detection():
+    from video_analysis import VideoAnalyzer
+    import cv2
+    import numpy as np
+    frame = np.full((480, 640, 3), 60, np.uint8)
+    cv2.circle(frame, (200, 240), 60, (255, 255, 255), 3)
+    cv2.circle(frame, (480, 150), 40, (255, 255, 255), 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer = VideoAnalyzer(_write_test_video(os.path.join(tmp, 'clip.avi'), frames=1),
+                                 detection_scale=0.5, hough_param2=30, hough_blur=5,
+                                 min_radius=20, max_radius=100, roi_search=True)
+    full = sorted(analyzer.detect_circles(frame))
+    assert len(full) == 2
+    for (x, y, r), (ex, ey, er) in zip(full, [(200, 240, 60), (480, 150, 40)]):
+        assert abs(x - ex) <= 4 and abs(y - ey) <= 4 and abs(r - er) <= 5
+    analyzer._last_circles = [full[0]]
+    rois = analyzer.circle_search_rois(1, 640, 480)
+    assert analyzer.circle_search_rois(analyzer.full_search_interval, 640, 480) is None
+    assert analyzer.detect_circles(frame, rois) == [full[0]]
+    # Pipeline ROI'leri uygulayamaz; sessizce farklı sonuç vermek yerine reddedilir
+    try:
+        VideoAnalyzer('unused.avi', roi_search=True, pipeline_workers=2)
+        assert False, 'roi_search with pipeline_workers must be rejected'
+    except ValueError:
+        pass
+
+def test_frame_sampling_marks_skipped():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        full = VideoAnalyzer(path).analyze_video()
+        strided = VideoAnalyzer(path, sampling='stride', sample_stride=3).analyze_video()
+    circles = strided['circle_detection_data']
+    assert [c['frame'] for c in circles] == list(range(20))
+    assert [c['frame'] for c in circles if not c.get('skipped')] == list(range(0, 20, 3))
+    assert [c['yellow_circles'] for c in circles if not c.get('skipped')] == \
+        [c['yellow_circles'] for c in full['circle_detection_data'][::3]]
+    assert [m['frame'] for m in strided['movement_data']] == list(range(1, 20))
+    result = DecisionMaker().analyze_decision_patterns(strided)
+    assert result['total_decisions'] == 19
+    assert result['skipped_frames'] == 13
+    # Atlanan frame'ler son analiz edilen frame'in sarı çemberini taşır
+    assert result['decisions'].count('approach_yellow') == 19
+    # Uyarlamalı örnekleme toplayıcının sonucuna bağlı; pipeline ile reddedilir
+    try:
+        VideoAnalyzer('unused.avi', sampling='adaptive', pipeline_workers=2)
+        assert False, 'adaptive sampling with pipeline_workers must be rejected'
+    except ValueError:
+        pass
+
+def test_streaming_jsonl_output():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        expected = json.loads(json.dumps(VideoAnalyzer(path).analyze_video()))
+        output = os.path.join(tmp, 'clip_analysis.jsonl')
+        analyzer = VideoAnalyzer(path, keep_history=False)
+        with AnalysisStreamWriter(output) as writer:
+            results = analyzer.analyze_video(writer)
+        assert results['movement_data'] == [] and results['circle_detection_data'] == []
+        assert load_analysis_jsonl(output) == expected
+
+def test_columnar_round_trip():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        results = VideoAnalyzer(path, sampling='stride', sample_stride=2).analyze_video()
+        expected = json.loads(json.dumps(results))
+        for output in (os.path.join(tmp, 'clip_analysis.npz'), os.path.join(tmp, 'clip_analysis')):
+            save_columnar(results, output)
+            columnar = load_columnar(output)
+            assert json.loads(json.dumps(columnar.to_dict())) == expected
+            assert DecisionMaker().analyze_decision_patterns(columnar) == \
+                DecisionMaker().analyze_decision_patterns(results)
+            columnar.close()
+
+def _linear_scan_decisions(video_data):
+    # Frame indeksinden önceki davranış: her hareket kaydı için çember listesini baştan tara
+    movement_data = video_data['movement_data']
+    circle_data = video_data['circle_detection_data']
+    decisions = []
+    good = 0
+    held = None
+    for i, data in enumerate(movement_data):
+        velocity = data.get('velocity', 0)
+        frame_circles = None
+        for circle_info in circle_data:
+            if circle_info.get('frame') == i:
+                frame_circles = circle_info
+                break
+        if frame_circles is not None and frame_circles.get('skipped'):
+            frame_circles = held
+        elif frame_circles is not None:
+            held = frame_circles
+        yellow = bool(frame_circles and frame_circles.get('yellow_circles'))
+        normal = bool(frame_circles and frame_circles.get('circles'))
+        prev = movement_data[i - 1] if i > 0 else None
+        direction_change = abs(data.get('direction', 0) - prev.get('direction', 0)) if prev else 0
+        if yellow:
+            decision = 'approach_yellow'
+            quality = 0.9 if (velocity > prev.get('velocity', 0) if prev else velocity > 1.0) else 0.6
+        elif velocity < 0.3:
+            decision, quality = 'stop', 0.8 if normal else 0.4
+        elif velocity > 3.0:
+            decision, quality = 'move', 0.8 if direction_change < 15 else 0.5
+        elif normal:
+            decision, quality = 'navigate', 0.8 if 0.5 < velocity < 2.5 and direction_change < 30 else 0.6
+        else:
+            decision, quality = 'cruise', 0.7 if 1.0 < velocity < 2.0 and direction_change < 20 else 0.5
+        decisions.append(decision)
+        if quality > 0.7:
+            good += 1
+    return decisions, good
+
+def _synthetic_video_data(frames=400, seed=1):
+    import random
+    rng = random.Random(seed)
+    movement_data = []
+    circle_data = []
+    for frame in range(frames):
+        skipped = rng.random() < 0.1
+        circle_data.append({
+            'frame': frame,
+            'circles_count': 0 if skipped else rng.randint(0, 2),
+            'circles': [] if skipped else [(rng.randint(0, 640), rng.randint(0, 480), 20)] * rng.randint(0, 2),
+            'yellow_circles': [] if skipped or rng.random() < 0.6 else [(100, 100, 15)],
+            **({'skipped': True} if skipped else {})
+        })
+        if frame > 0:
+            movement_data.append({'velocity': rng.uniform(0, 4), 'direction': rng.uniform(-180, 180), 'frame': frame})
+    # Sırasız ve tekrarlı kayıtlar: ilk eşleşen kayıt kullanılmalı
+    rng.shuffle(circle_data)
+    circle_data.append({'frame': 5, 'circles_count': 1, 'circles': [(1, 1, 1)], 'yellow_circles': [(1, 1, 1)]})
+    return {'movement_data': movement_data, 'circle_detection_data': circle_data}
+
+def test_decisions_match_linear_scan():
+    data = _synthetic_video_data()
+    decisions, good = _linear_scan_decisions(data)
+    result = DecisionMaker().analyze_decision_patterns(data)
+    assert result['decisions'] == decisions
+    assert result['good_decisions_count'] == good
+    assert result['decision_accuracy'] == good / len(decisions)
+
+def test_reports_match_saved_results():
+    results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+    names = sorted(f[:-len('_analysis.json')] for f in os.listdir(results_dir) if f.endswith('_analysis.json'))
+    assert names
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            with open(os.path.join(results_dir, f"{name}_analysis.json")) as f:
+                data = json.load(f)
+            decision_maker = DecisionMaker()
+            report_file = os.path.join(tmp, f"{name}_report.txt")
+            decision_maker.generate_decision_report(decision_maker.analyze_decision_patterns(data), report_file)
+            with open(report_file) as generated, open(os.path.join(results_dir, f"{name}_report.txt")) as saved:
+                assert generated.read() == saved.read(), name
+
+def test_vectorized_engine_matches_loop():
+    import numpy as np
+    data = _synthetic_video_data()
+    # Çember kaydı olmayan (ama hareketi olan) sonuç da aynı kararları vermeli
+    no_circles = {'movement_data': data['movement_data'][:5], 'circle_detection_data': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        save_columnar(data, os.path.join(tmp, 'synthetic.npz'))
+        save_columnar(no_circles, os.path.join(tmp, 'no_circles.npz'))
+        columnar = load_columnar(os.path.join(tmp, 'synthetic.npz'))
+        no_circles_columnar = load_columnar(os.path.join(tmp, 'no_circles.npz'))
+        for loop_source, source in ((data, data), (data, columnar),
+                                    (no_circles, no_circles), (no_circles, no_circles_columnar)):
+            loop = DecisionMaker().analyze_decision_patterns(loop_source)
+            vectorized = DecisionMaker(engine='vectorized').analyze_decision_patterns(source)
+            assert vectorized['decisions'] == loop['decisions']
+            for key in ('decision_accuracy', 'total_decisions', 'movement_efficiency', 'total_circles_detected',
+                        'good_decisions_count', 'skipped_frames', 'average_velocity', 'average_direction_change'):
+                assert np.isclose(vectorized[key], loop[key]), key
+            positions = np.array([o['position'] for o in loop['orientation_data']])
+            assert np.allclose(vectorized['orientation_track']['position'], positions)
+            loop_report = os.path.join(tmp, 'loop.txt')
+            vectorized_report = os.path.join(tmp, 'vectorized.txt')
+            DecisionMaker().generate_decision_report(loop, loop_report)
+            DecisionMaker().generate_decision_report(vectorized, vectorized_report)
+            with open(loop_report) as a, open(vectorized_report) as b:
+                assert a.read() == b.read()
+        columnar.close()
+        no_circles_columnar.close()
+
+def test_live_stream_decisions():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'), fps=40)
+        batch = VideoAnalyzer(path).analyze_video()
+        decision_maker = DecisionMaker()
+        decision_maker.start_stream()
+        circle_data, movement_data, decisions = [], [], []
+        for circle_entry, movement in VideoAnalyzer(path).stream(pace=True):
+            circle_data.append(circle_entry)
+            if movement is not None:
+                movement_data.append(movement)
+            decision = decision_maker.decide_frame(circle_entry, movement)
+            if decision is not None:
+                decisions.append(decision['decision'])
+    assert [c['frame'] for c in circle_data] == list(range(20))
+    for streamed, expected in zip(circle_data, batch['circle_detection_data']):
+        if not streamed.get('skipped'):
+            assert streamed == expected
+    streamed_results = {'movement_data': movement_data, 'circle_detection_data': circle_data}
+    expected = DecisionMaker().analyze_decision_patterns(streamed_results)
+    assert decisions == expected['decisions']
+    summary = decision_maker.stream_summary()
+    assert summary['decision_counts'] == {d: decisions.count(d) for d in dict.fromkeys(decisions)}
+    assert summary['decision_accuracy'] == expected['decision_accuracy']
+
+def test_online_stats_window():
+    import random
+    rng = random.Random(3)
+    stats = OnlineDecisionStats(window_frames=25)
+    records = []
+    for i in range(300):
+        decision = rng.choice(['stop', 'move', 'cruise'])
+        quality, velocity, direction = rng.random(), rng.uniform(0, 4), rng.uniform(-180, 180)
+        stats.add_decision(decision, quality, velocity, direction)
+        records.append((decision, quality, velocity, direction))
+        window = records[-25:]
+        summary = stats.window_summary()
+        assert summary['frames'] == len(window)
+        assert summary['velocity_range'] == (min(r[2] for r in window), max(r[2] for r in window))
+        assert abs(summary['average_velocity'] - sum(r[2] for r in window) / len(window)) < 1e-9
+        assert summary['decision_accuracy'] == sum(r[1] > 0.7 for r in window) / len(window)
+        assert summary['decision_counts'] == {d: c for d, c in
+                                              ((d, sum(r[0] == d for r in window)) for d in ('stop', 'move', 'cruise')) if c}
+        if len(window) > 1:
+            changes = [abs(window[j][3] - window[j - 1][3]) for j in range(1, len(window))]
+            assert abs(summary['average_direction_change'] - sum(changes) / len(changes)) < 1e-6
+    total = stats.summary()
+    assert total['total_decisions'] == 300
+    assert total['orientation_summary']['min_yaw'] == min(r[3] for r in records)
+    assert len(DecisionMaker(history_size=50).decision_history) == 0
+
+def test_analysis_cache():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'), frames=3)
+        cache = AnalysisCache(os.path.join(tmp, 'cache'), max_bytes=10 ** 6)
+        analyzer = VideoAnalyzer(path)
+        key = cache.key(path, analyzer.detector_parameters())
+        assert cache.key(path, VideoAnalyzer(path, detection_scale=0.5).detector_parameters()) != key
+        assert cache.get(key) is None
+        results = analyzer.analyze_video()
+        cache.put(key, results)
+        assert cache.get(key) == json.loads(json.dumps(results))
+        cache.invalidate(key)
+        assert cache.get(key) is None
+        # Boyut sınırı: en eski kayıtlar silinir
+        small = AnalysisCache(os.path.join(tmp, 'small'), max_bytes=2500)
+        for i in range(5):
+            small.put(f"entry{i}", {'payload': 'x' * 1000})
+            os.utime(small._path(f"entry{i}"), (i, i))
+        small.evict()
+        assert [small.get(f"entry{i}") is not None for i in range(5)] == [False, False, False, True, True]
+
+def test_stage_metrics():
+    from video_analysis import VideoAnalyzer
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        metrics = Metrics()
+        VideoAnalyzer(path, metrics=metrics, sampling='stride', sample_stride=2).analyze_video()
+        metrics.save(os.path.join(tmp, 'clip_metrics.json'))
+        with open(os.path.join(tmp, 'clip_metrics.json')) as f:
+            summary = json.load(f)
+    assert summary['frames'] == 10
+    assert summary['counters']['frames_skipped'] == 10
+    for stage in ('decode', 'grab', 'detect_circles', 'detect_yellow_circles', 'track_movement'):
+        assert summary['stages'][stage]['calls'] > 0
+    latency = summary['frame_latency_ms']
+    assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+
+def test_synthetic_benchmark():
+    from benchmark import run_benchmarks
+    results = run_benchmarks(clips=[(160, 120, 12)], repeat=1)
+    json.dumps(results)
+    timings = results['clips'][0]['timings']
+    for stage in ('analyze_video', 'detect_circles', 'detect_yellow_circles', 'track_movement',
+                  'decisions_loop', 'decisions_vectorized', 'generate_decision_report'):
+        assert timings[stage]['seconds'] > 0
+    assert results['environment']['opencv']
+
+def test_batch_path_planning_matches_scalar():
+    import numpy as np
+    from rov_path_planner import ROVPathPlanner, Position, Orientation, MOTOR_KEYS, MOVEMENT_KEYS, states_to_arrays
+    rng = np.random.default_rng(7)
+    positions = [Position(*p) for p in rng.uniform(-500, 500, (50, 3))]
+    orientations = [Orientation(*o) for o in rng.uniform(-720, 720, (50, 3))]
+    centers = rng.uniform(-500, 500, (50, 2))
+    planner = ROVPathPlanner()
+    pos_array, orient_array = states_to_arrays(positions, orientations)
+    movements, commands = planner.plan_circle_approach_batch(pos_array, orient_array, centers, 40)
+    for i in range(50):
+        planner.set_current_state(positions[i], orientations[i])
+        expected = planner.plan_circle_approach(tuple(centers[i]), 40)
+        expected_commands = planner.generate_motor_commands(expected)
+        assert np.allclose(movements[i], [expected[k] for k in MOVEMENT_KEYS])
+        assert np.allclose(commands[i], [expected_commands[k] for k in MOTOR_KEYS])
+    # Tek durum, birçok çember
+    movements, _ = planner.plan_circle_approach_batch(pos_array[0], orient_array[0], centers, 40)
+    assert movements.shape == (50, 6)
+
+def test_circular_trajectory():
+    from rov_path_planner import ROVPathPlanner, Position, Orientation
+    from movement_controller import MovementController
+    planner = ROVPathPlanner()
+    planner.set_current_state(Position(130, 40, -5), Orientation(0, 0, 10))
+    trajectory = planner.generate_circular_trajectory((30, 40), 100, step_degrees=5, max_speed=20)
+    expected = planner.plan_circular_path((30, 40), 100)
+    planner.set_target_state(*trajectory.waypoint(0))
+    actual = planner.calculate_movement_requirements()
+    for key, value in expected.items():
+        assert abs(actual[key] - value) < 1e-9
+    assert len(trajectory) == 72
+    # 5 derecelik yay ~8.73 birim; 20 birim/s ile her yol noktası ~0.436 s
+    assert abs(trajectory.dt - 100 * 0.0872665 / 20) < 1e-4
+    assert trajectory.index_at(trajectory.dt * 3.5) == 3
+    assert trajectory.index_at(trajectory.duration + trajectory.dt) == 1
+    
+    controller = MovementController()
+    controller.set_current_state(Position(130, 40, -5), Orientation(0, 0, 10))
+    for _ in range(10):
+        controller.follow_circular_path((30, 40), 100, replan_tolerance=5.0)
+    controller.follow_circular_path((33, 42), 100, replan_tolerance=5.0)
+    assert controller.replan_count == 1
+    controller.follow_circular_path((50, 40), 100, replan_tolerance=5.0)
+    assert controller.replan_count == 2
+    assert controller.trajectory_index == 1
+
+def test_control_loop_with_simulated_plant():
+    import threading
+    import time
+    from rov_path_planner import Position, Orientation
+    from movement_controller import MovementController, ControlLoop, SimulatedPlant
+    controller = MovementController(history_size=50)
+    controller.path_planner.set_target_state(Position(100, -40, 10), Orientation(0, 0, 90))
+    plant = SimulatedPlant(max_speed=500.0, max_turn_rate=450.0)
+    published = []
+    
+    def on_commands(commands):
+        published.append(commands)
+        # Simülasyon zamanı duvar saatinden bağımsız: her adım 5 ms
+        loop.update_state(*plant.apply(commands, 0.005))
+    
+    loop = ControlLoop(controller, rate_hz=1000, on_commands=on_commands)
+    loop.update_state(plant.position, plant.orientation)
+    loop.run(ticks=400)
+    assert loop.ticks == len(published) == controller.command_count == 400
+    assert len(controller.movement_history) == 50
+    assert abs(plant.position.x - 100) < 1 and abs(plant.position.y + 40) < 1
+    assert abs(plant.orientation.yaw - 90) < 1
+    
+    with ControlLoop(MovementController(), rate_hz=100) as threaded:
+        threaded.update_state(Position(), Orientation())
+        time.sleep(0.1)
+    stats = threaded.stats()
+    assert stats['ticks'] > 0 and stats['jitter_ms']['max'] >= stats['jitter_ms']['p95'] >= 0
+    assert stats['overruns'] >= 0
+    
+    # stats() döngü thread'i çalışırken başka bir thread'den okunabilir
+    errors = []
+    def poll(loop, deadline):
+        while time.perf_counter() < deadline:
+            try:
+                loop.stats()
+            except RuntimeError as e:
+                errors.append(e)
+    with ControlLoop(MovementController(), rate_hz=5000, stats_size=200) as running:
+        pollers = [threading.Thread(target=poll, args=(running, time.perf_counter() + 0.5)) for _ in range(2)]
+        for poller in pollers:
+            poller.start()
+        for poller in pollers:
+            poller.join()
+    assert errors == []
+    assert running.stats()['ticks'] > 0
+
+def test_circle_tracking():
+    from video_analysis import VideoAnalyzer
+    from circle_tracker import CircleTracker
+    from synthetic_video import generate_synthetic_video
+    tracker = CircleTracker(max_distance=20, max_missed=2)
+    # Sabit hızla giden çember bir frame kaçırılsa da aynı ID'yi korur
+    tracker.update([(100, 50, 10)], [], 0)
+    tracker.update([(105, 50, 10)], [], 1)
+    assert tracker.predicted_circles(3) == [(115, 50, 10)]
+    tracks = tracker.update([(115, 51, 10), (20, 20, 5)], [(21, 19, 6)], 3)
+    assert [(t.id, t.yellow) for t in tracks] == [(1, False), (2, True)]
+    assert abs(tracks[0].vx - 5.0) < 1e-9
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'clip.avi')
+        generate_synthetic_video(path, 320, 240, 30, fps=10, pan_speed=3.0, shake=0.5)
+        options = dict(min_radius=10, max_radius=60, hough_param2=40, track_circles=True)
+        results = VideoAnalyzer(path, **options).analyze_video()
+        roi_results = VideoAnalyzer(path, roi_search=True, **options).analyze_video()
+        save_columnar(results, os.path.join(tmp, 'clip.npz'))
+        loaded = load_columnar(os.path.join(tmp, 'clip.npz'))
+        assert (json.loads(json.dumps(loaded.to_dict()['circle_detection_data']))
+                == json.loads(json.dumps(results['circle_detection_data'])))
+        loaded.close()
+    
+    yellow_ids = {t['id'] for entry in results['circle_detection_data'] for t in entry['tracks'] if t['yellow']}
+    assert yellow_ids == {1}
+    last_yellow = [t for t in results['circle_detection_data'][-1]['tracks'] if t['yellow']][0]
+    assert last_yellow['age'] == 30 and last_yellow['vx'] < -1.5
+    roi_yellow = [t for t in roi_results['circle_detection_data'][-1]['tracks'] if t['yellow']][0]
+    assert roi_yellow['id'] == 1 and roi_yellow['age'] == 30
+    
+    controller = MovementController()
+    targets = set()
+    for entry in results['circle_detection_data']:
+        if controller.approach_tracked_circle(entry['tracks']) is not None:
+            targets.add(controller.target_track_id)
+    assert targets == {1}
+
+def test_scaled_yellow_mask_matches_full():
+    from video_analysis import VideoAnalyzer
+    from benchmark import QUICK_CLIPS, _decode_frames
+    from synthetic_video import generate_synthetic_video
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height, frames in QUICK_CLIPS:
+            path = os.path.join(tmp, f"clip_{width}.avi")
+            generate_synthetic_video(path, width, height, frames)
+            decoded = _decode_frames(path, frames)
+            reference = VideoAnalyzer(path)
+            for scale in (0.5, 0.75):
+                analyzer = VideoAnalyzer(path, yellow_mask_scale=scale)
+                masks = set()
+                for frame in decoded:
+                    expected = sorted(reference.detect_yellow_circles(frame))
+                    actual = sorted(analyzer.detect_yellow_circles(frame))
+                    masks.add(id(analyzer._mask_buffers.value))
+                    assert len(actual) == len(expected)
+                    for a, b in zip(actual, expected):
+                        assert max(abs(x - y) for x, y in zip(a, b)) <= 2
+                # Maske tamponu frame'ler arasında yeniden kullanılır
+                assert len(masks) == 1
+            # Alan eşiği ve HSV sınırları ayarlanabilir
+            assert VideoAnalyzer(path, yellow_min_area=width * height).detect_yellow_circles(decoded[0]) == []
+            assert VideoAnalyzer(path, yellow_hsv_lower=(150, 100, 100), yellow_hsv_upper=(160, 255, 255),
+                                 yellow_mask_scale=0.5).detect_yellow_circles(decoded[0]) == []
+    parameters = VideoAnalyzer(None, yellow_mask_scale=0.5, yellow_min_area=50).detector_parameters()
+    assert parameters['yellow_min_area'] == 50 and parameters['yellow_mask_scale'] == 0.5
+
+def test_parameter_sweep_matches_full_runs():
+    from video_analysis import VideoAnalyzer
+    from parameter_sweep import run_sweep, format_table, parse_grid
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_test_video(os.path.join(tmp, 'clip.avi'))
+        detector_grid = parse_grid(['hough_param2=40,100', 'yellow_min_area=100,100000'])
+        decision_grid = parse_grid(['stop_velocity=0.3,100'])
+        sweep = run_sweep(path, detector_grid, decision_grid)
+        assert sweep['configurations'] == 8 and sweep['frames'] == 20
+        for row in sweep['rows']:
+            analysis = VideoAnalyzer(path, **row['detector']).analyze_video()
+            result = DecisionMaker(thresholds=row['decision']).analyze_decision_patterns(analysis)
+            assert row['circles_detected'] == sum(c['circles_count'] for c in analysis['circle_detection_data'])
+            assert row['decision_accuracy'] == result['decision_accuracy']
+            assert row['decision_counts'] == result['decision_counts']
+    assert all(row['yellow_frames'] == 0 for row in sweep['rows'] if row['detector']['yellow_min_area'] == 100000)
+    assert 'hough_param2=40 yellow_min_area=100' in format_table(sweep)
+    # Paylaşılan gri/HSV dönüşümleri ayar sürelerine değil ayrı alana yazılır
+    assert sweep['shared_ms_per_frame'] > 0 and 'shared preprocessing' in format_table(sweep)
+    
+    # Çember takibi ve ROI araması her ayar için ayrı durumla çalışır
+    from synthetic_video import generate_synthetic_video
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'clip.avi')
+        generate_synthetic_video(path, 320, 240, 30, fps=10, pan_speed=3.0, shake=0.5)
+        base = dict(min_radius=10, max_radius=60, hough_param2=40)
+        grid = parse_grid(['track_circles=true', 'roi_search=false,true'])
+        sweep = run_sweep(path, grid, base_options=base)
+        for row in sweep['rows']:
+            analysis = VideoAnalyzer(path, **base, **row['detector']).analyze_video()
+            assert row['circles_detected'] == sum(c['circles_count'] for c in analysis['circle_detection_data'])
+            assert row['yellow_frames'] == sum(1 for c in analysis['circle_detection_data'] if c['yellow_circles'])
+        for options in (['tracking_mode=persistent'], ['sampling=stride', 'pipeline_workers=2']):
+            try:
+                run_sweep(path, parse_grid(options))
+                assert False, 'options the sweep cannot vary must be rejected'
+            except ValueError as e:
+                assert all(option.split('=')[0] in str(e) for option in options)
+    json.dumps(sweep)
+
+def test_report_subcommand_without_video_imports():
+    import shutil
+    import subprocess
+    from main import regenerate_reports
+    results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(results_dir, 'video1_analysis.json'), tmp)
+        with open(os.path.join(results_dir, 'video1_analysis.json')) as f:
+            save_columnar(json.load(f), os.path.join(tmp, 'columnar_analysis.npz'))
+        reports = regenerate_reports([tmp])
+        assert sorted(os.path.basename(r) for r in reports) == ['columnar_report.txt', 'video1_report.txt']
+        with open(os.path.join(results_dir, 'video1_report.txt')) as f:
+            expected = f.read()
+        for report in reports:
+            with open(report) as f:
+                assert f.read() == expected
+    # Rapor yolu ve karar modülleri OpenCV/NumPy yüklemeden açılır
+    code = ("import sys, main, decision_maker, movement_controller; "
+            "print('cv2' in sys.modules, 'numpy' in sys.modules)")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+    assert output == ['False', 'False']
+
+def test_chunked_analysis_matches_sequential():
+    from video_analysis import VideoAnalyzer, split_frame_ranges, merge_chunk_results
+    from main import ROVAnalysisSystem
+    assert split_frame_ranges(10, 3) == [(0, 3), (3, 6), (6, None)]
+    assert split_frame_ranges(2, 5) == [(0, 1), (1, None)]
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = os.path.join(tmp, 'videos')
+        os.makedirs(videos)
+        path = _write_test_video(os.path.join(videos, 'clip.avi'), frames=23)
+        sequential = VideoAnalyzer(path).analyze_video()
+        for chunks in (2, 5):
+            parts = [VideoAnalyzer(path).analyze_chunk(start, end)
+                     for start, end in split_frame_ranges(VideoAnalyzer(path).frame_count(), chunks)]
+            assert json.dumps(merge_chunk_results(parts)) == json.dumps(sequential)
+        
+        outputs = {}
+        for chunks in (1, 3):
+            output_dir = os.path.join(tmp, f"out{chunks}")
+            ROVAnalysisSystem(videos, output_dir, announce=False, chunks=chunks).analyze_all()
+            outputs[chunks] = [open(os.path.join(output_dir, f"clip_{kind}")).read()
+                               for kind in ('analysis.json', 'report.txt')]
+        assert outputs[1] == outputs[3]
+        # --profile ile parçaların ölçümleri birleştirilir
+        ROVAnalysisSystem(videos, os.path.join(tmp, 'profiled'), announce=False, chunks=3,
+                          profile=True).analyze_all()
+        with open(os.path.join(tmp, 'profiled', 'clip_metrics.json')) as f:
+            summary = json.load(f)
+        assert summary['frames'] == 23
+        assert summary['stages']['detect_circles']['calls'] == 23
+        assert summary['counters']['chunks'] == 3
+    try:
+        VideoAnalyzer(path, sampling='stride').analyze_chunk(0, 5)
+        assert False, 'stride sampling must be rejected'
+    except ValueError:
+        pass
+
+def test_parallel_batch_matches_sequential():
+    from main import ROVAnalysisSystem
+    from synthetic_video import generate_synthetic_video
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = os.path.join(tmp, 'videos')
+        os.makedirs(videos)
+        generate_synthetic_video(os.path.join(videos, 'a.avi'), 160, 120, 12, seed=1)
+        generate_synthetic_video(os.path.join(videos, 'b.avi'), 160, 120, 15, seed=2)
+        with open(os.path.join(videos, 'broken.avi'), 'wb') as f:
+            f.write(b'not a video' * 100)
+        summaries = {}
+        for workers in (1, 2):
+            output_dir = os.path.join(tmp, f"out{workers}")
+            system = ROVAnalysisSystem(videos, output_dir, announce=False)
+            summaries[workers] = system.analyze_all(workers=workers)
+        for name in ('a', 'b'):
+            for kind in ('analysis.json', 'report.txt'):
+                with open(os.path.join(tmp, 'out1', f"{name}_{kind}")) as a, \
+                        open(os.path.join(tmp, 'out2', f"{name}_{kind}")) as b:
+                    assert a.read() == b.read()
+    for workers, summary in summaries.items():
+        entries = {entry['video']: entry for entry in summary}
+        assert sorted(entries) == ['a.avi', 'b.avi', 'broken.avi']
+        assert [entries['a.avi']['frames'], entries['b.avi']['frames']] == [12, 15]
+        assert entries['a.avi']['error'] is None and entries['b.avi']['error'] is None
+        # Bozuk video diğerlerini durdurmaz, özette hata olarak kalır
+        assert entries['broken.avi']['frames'] == 0
+        assert entries['broken.avi']['error'].startswith('OSError: Cannot open video')
+    assert [entry['video'] for entry in summaries[1]] == [entry['video'] for entry in summaries[2]]
+
+def test_bounded_memory_decides_from_stream():
+    from main import ROVAnalysisSystem
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = os.path.join(tmp, 'videos')
+        os.makedirs(videos)
+        _write_test_video(os.path.join(videos, 'clip.avi'))
+        reports = {}
+        for mode, options in (('full', {}), ('bounded', {'keep_history': False})):
+            output_dir = os.path.join(tmp, mode)
+            system = ROVAnalysisSystem(videos, output_dir, announce=False, analyzer_options=options,
+                                       stream_results=mode == 'bounded')
+            results = system.analyze_video(os.path.join(videos, 'clip.avi'))
+            with open(os.path.join(output_dir, 'clip_report.txt')) as f:
+                reports[mode] = f.read()
+        # Sınırlı bellekte frame geçmişi hiçbir aşamada toplanmaz
+        assert results['movement_data'] == [] and results['circle_detection_data'] == []
+        assert reports['bounded'] == reports['full']
+        for bad in ({'stream_results': True, 'results_format': 'npz'},
+                    {'stream_results': True, 'analyzer_options': {'keep_history': False}, 'cache_dir': tmp}):
+            try:
+                ROVAnalysisSystem(videos, os.path.join(tmp, 'bad'), announce=False, **bad)
+                assert False, bad
+            except ValueError:
+                pass
+
+TESTS = [test_basic, test_pipeline_matches_sequential, test_pipeline_detector_error_does_not_hang,
+         test_persistent_tracking,
+         test_scaled_roi_circle_detection, test_frame_sampling_marks_skipped,
+         test_streaming_jsonl_output, test_columnar_round_trip, test_decisions_match_linear_scan,
+         test_reports_match_saved_results, test_vectorized_engine_matches_loop, test_live_stream_decisions,
+         test_online_stats_window, test_analysis_cache, test_stage_metrics,
+         test_synthetic_benchmark, test_batch_path_planning_matches_scalar,
+         test_circular_trajectory, test_control_loop_with_simulated_plant,
+         test_circle_tracking, test_scaled_yellow_mask_matches_full,
+         test_parameter_sweep_matches_full_runs, test_report_subcommand_without_video_imports,
+         test_chunked_analysis_matches_sequential, test_parallel_batch_matches_sequential,
+         test_bounded_memory_decides_from_stream]
+
 def run_tests():
     print("Running tests...")
     
-    if test_basic():
+    failed = 0
+    for test in TESTS:
+        try:
+            if test() is False:
+                failed += 1
+        except Exception as e:
+            print(f"{test.__name__} failed: {e!r}")
+            failed += 1
+    if not failed:
         print("All tests passed")
         return True
     else:
-        print("Tests failed")
+        print(f"Tests failed: {failed}")
         return False
 
 if __name__ == "__main__":
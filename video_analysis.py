@@ -1,41 +1,258 @@
 import cv2
 import numpy as np
 import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import NULL_METRICS
+from analysis_io import to_builtin
+from circle_tracker import CircleTracker
+class PreparedFrame:
+    """Bir frame'in tüm detector'lar arasında paylaşılan ön işlenmiş hali.
+
+    Gri, HSV ve küçültülmüş gri/BGR/HSV görüntüler ilk istendiklerinde bir kez
+    hesaplanır ve sonra aynı frame için tekrar kullanılır.
+    """
+    def __init__(self, frame):
+        self.frame = frame
+        self.created = time.perf_counter()
+        self._gray = None
+        self._hsv = None
+        self._scaled_gray = {}
+        self._scaled_frame = {}
+        self._scaled_hsv = {}
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+    @property
+    def hsv(self):
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
+        return self._hsv
+    def scaled_gray(self, scale):
+        if scale == 1.0:
+            return self.gray
+        if scale not in self._scaled_gray:
+            self._scaled_gray[scale] = cv2.resize(self.gray, None, fx=scale, fy=scale,
+                                                  interpolation=cv2.INTER_AREA)
+        return self._scaled_gray[scale]
+    def scaled_frame(self, scale):
+        if scale == 1.0:
+            return self.frame
+        if scale not in self._scaled_frame:
+            self._scaled_frame[scale] = cv2.resize(self.frame, None, fx=scale, fy=scale,
+                                                   interpolation=cv2.INTER_AREA)
+        return self._scaled_frame[scale]
+    def scaled_hsv(self, scale):
+        if scale == 1.0:
+            return self.hsv
+        if scale not in self._scaled_hsv:
+            self._scaled_hsv[scale] = cv2.cvtColor(self.scaled_frame(scale), cv2.COLOR_BGR2HSV)
+        return self._scaled_hsv[scale]
+def prepare_frame(frame):
+    if isinstance(frame, PreparedFrame):
+        return frame
+    return PreparedFrame(frame)
+def to_gray(image):
+    if isinstance(image, PreparedFrame):
+        return image.gray
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 class VideoAnalyzer:
-    def __init__(self, video_path):
+    def __init__(self, video_path, pipeline_workers=0, queue_size=8, tracking_mode='detect',
+                 min_tracked_points=30, redetect_interval=10, fb_threshold=1.0,
+                 detection_scale=1.0, min_radius=0, max_radius=0, hough_min_dist=50, hough_param1=100,
+                 hough_param2=100, hough_blur=0,
+                 roi_search=False, full_search_interval=10, roi_margin=20,
+                 track_circles=False, track_max_distance=50, track_max_missed=5,
+                 yellow_hsv_lower=(20, 100, 100), yellow_hsv_upper=(30, 255, 255), yellow_min_area=100,
+                 yellow_mask_scale=1.0,
+                 sampling='all', sample_stride=2, sample_rate=5.0, max_skip=8,
+                 velocity_change_threshold=0.5, keep_history=True, metrics=None):
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
+        # Capture ilk kullanımda açılır (önbellekten dönen analizlerde video hiç açılmaz)
+        self._cap = None
         self.movement_data = []
         self.circle_data = []
-    def detect_circles(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, 50)
+        # keep_history=False: frame geçmişi bellekte tutulmaz (sadece writer'a akar)
+        self.keep_history = keep_history
+        # metrics: instrumentation.Metrics ise aşama süreleri ölçülür, yoksa boş nesne
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        # pipeline_workers > 0: decode / detection / toplama aşamaları ayrı thread'lerde
+        self.pipeline_workers = pipeline_workers
+        self.queue_size = queue_size
+        # tracking_mode='persistent': LK noktaları frame'ler arasında taşınır,
+        # köşe tespiti sadece nokta sayısı düşünce ya da her redetect_interval frame'de yapılır
+        self.tracking_mode = tracking_mode
+        self.min_tracked_points = min_tracked_points
+        self.redetect_interval = redetect_interval
+        self.fb_threshold = fb_threshold
+        self._tracked_points = None
+        self._frames_since_detect = 0
+        # Hough ayarları: detection_scale < 1 ise Hough küçültülmüş frame'de çalışır,
+        # koordinatlar ve yarıçaplar orijinal çözünürlüğe geri ölçeklenir
+        self.detection_scale = detection_scale
+        self.min_radius = min_radius
+        self.max_radius = max_radius
+        self.hough_min_dist = hough_min_dist
+        self.hough_param1 = hough_param1
+        self.hough_param2 = hough_param2
+        self.hough_blur = hough_blur
+        # roi_search: önceki frame'deki çemberlerin çevresinde ara, her
+        # full_search_interval frame'de bir tüm frame'i tara. ROI'ler bir önceki
+        # frame'in sonucuna bağlı olduğu için sadece sıralı modda çalışır
+        if roi_search and pipeline_workers > 0:
+            raise ValueError("roi_search needs sequential analysis (pipeline_workers=0)")
+        self.roi_search = roi_search
+        self.full_search_interval = full_search_interval
+        self.roi_margin = roi_margin
+        self._last_circles = []
+        # track_circles: çemberler frame'ler arasında eşlenir, sonuçlara track ID ve
+        # hızları eklenir; roi_search açıksa ROI'ler tahmini konumlardan kurulur
+        self.circle_tracker = (CircleTracker(track_max_distance, track_max_missed)
+                               if track_circles else None)
+        # Sarı maske: yellow_mask_scale < 1 ise maske ve kontürler küçültülmüş frame'de çıkarılır
+        self.yellow_hsv_lower = tuple(yellow_hsv_lower)
+        self.yellow_hsv_upper = tuple(yellow_hsv_upper)
+        self.yellow_min_area = yellow_min_area
+        self.yellow_mask_scale = yellow_mask_scale
+        self._yellow_lower = np.array(self.yellow_hsv_lower)
+        self._yellow_upper = np.array(self.yellow_hsv_upper)
+        # Maske tamponu frame boyutu değişmedikçe yeniden kullanılır; pipeline modunda
+        # detector thread'leri çakışmasın diye her thread'in kendi tamponu vardır
+        self._mask_buffers = threading.local()
+        # Frame örnekleme: 'all', 'stride' (her N. frame), 'rate' (saniyede sample_rate frame)
+        # ya da 'adaptive' (sahne değişince sık, durağanken max_skip'e kadar seyrek).
+        # 'adaptive' atlama aralığı toplanan sonuçlarla güncellendiği için sadece sıralı modda çalışır
+        if sampling == 'adaptive' and pipeline_workers > 0:
+            raise ValueError("adaptive sampling needs sequential analysis (pipeline_workers=0)")
+        self.sampling = sampling
+        self.sample_stride = sample_stride
+        self.sample_rate = sample_rate
+        self.max_skip = max_skip
+        self.velocity_change_threshold = velocity_change_threshold
+        self._adaptive_skip = 0
+    @property
+    def cap(self):
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.video_path)
+        return self._cap
+    def detector_parameters(self):
+        # Analiz sonucunu etkileyen tüm ayarlar (önbellek anahtarı için);
+        # paralellik ve bellek ayarları sonucu değiştirmediği için dahil değil
+        # (sonucu değiştirecek pipeline birleşimleri __init__'te reddedilir)
+        return {
+            'yellow_hsv': [list(self.yellow_hsv_lower), list(self.yellow_hsv_upper)],
+            'yellow_min_area': self.yellow_min_area,
+            'yellow_mask_scale': self.yellow_mask_scale,
+            'hough': {
+                'detection_scale': self.detection_scale, 'min_radius': self.min_radius,
+                'max_radius': self.max_radius, 'min_dist': self.hough_min_dist,
+                'param1': self.hough_param1, 'param2': self.hough_param2, 'blur': self.hough_blur,
+                'roi_search': self.roi_search, 'full_search_interval': self.full_search_interval,
+                'roi_margin': self.roi_margin
+            },
+            'circle_tracker': self.circle_tracker.parameters() if self.circle_tracker is not None else None,
+            'tracker': {
+                'mode': self.tracking_mode, 'min_tracked_points': self.min_tracked_points,
+                'redetect_interval': self.redetect_interval, 'fb_threshold': self.fb_threshold
+            },
+            'sampling': {
+                'mode': self.sampling, 'stride': self.sample_stride, 'rate': self.sample_rate,
+                'max_skip': self.max_skip, 'velocity_change_threshold': self.velocity_change_threshold
+            }
+        }
+    def detect_circles(self, frame, rois=None):
+        scale = self.detection_scale
+        if isinstance(frame, PreparedFrame):
+            gray = frame.scaled_gray(scale)
+        else:
+            gray = to_gray(frame)
+            if scale != 1.0:
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if self.hough_blur:
+            gray = cv2.medianBlur(gray, self.hough_blur)
+        
+        if rois is None:
+            found = self._hough(gray, 0, 0)
+        else:
+            found = []
+            for (x0, y0, x1, y1) in rois:
+                x0, y0 = int(x0 * scale), int(y0 * scale)
+                x1, y1 = int(np.ceil(x1 * scale)), int(np.ceil(y1 * scale))
+                found.extend(self._hough(gray[y0:y1, x0:x1], x0, y0))
+        
         detected = []
-        if circles is not None:
-            circles = np.round(circles[0, :]).astype("int")
-            for (x, y, r) in circles:
-                detected.append((x, y, r))
+        min_dist = self.hough_min_dist
+        for (x, y, r) in found:
+            x, y, r = int(round(x / scale)), int(round(y / scale)), int(round(r / scale))
+            # Örtüşen ROI'lerden gelen aynı çemberi iki kez sayma
+            if rois is not None and any((x - px)**2 + (y - py)**2 < min_dist**2 for (px, py, _) in detected):
+                continue
+            detected.append((x, y, r))
         return detected
+    def _hough(self, gray, offset_x, offset_y):
+        if gray.shape[0] < 3 or gray.shape[1] < 3:
+            return []
+        scale = self.detection_scale
+        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, self.hough_min_dist * scale,
+                                   param1=self.hough_param1, param2=self.hough_param2 * scale,
+                                   minRadius=int(self.min_radius * scale),
+                                   maxRadius=int(round(self.max_radius * scale)))
+        if circles is None:
+            return []
+        return [(x + offset_x, y + offset_y, r) for (x, y, r) in circles[0, :]]
+    def circle_search_rois(self, frame_count, width, height):
+        if not self.roi_search or frame_count % self.full_search_interval == 0:
+            return None
+        if self.circle_tracker is not None:
+            candidates = self.circle_tracker.predicted_circles(frame_count)
+        else:
+            candidates = self._last_circles
+        if not candidates:
+            return None
+        rois = []
+        for (x, y, r) in candidates:
+            pad = r + self.roi_margin
+            rois.append((max(0, x - pad), max(0, y - pad), min(width, x + pad), min(height, y + pad)))
+        return rois
     
     def detect_yellow_circles(self, frame):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        lower_yellow = np.array([20, 100, 100])
-        upper_yellow = np.array([30, 255, 255])
-        mask = cv2.inRange(hsv, lower_yellow, upper_yellow)
+        prepared = prepare_frame(frame)
+        scale = self.yellow_mask_scale
+        hsv = prepared.scaled_hsv(scale)
+        mask = self._mask_buffer(hsv.shape[:2])
+        cv2.inRange(hsv, self._yellow_lower, self._yellow_upper, dst=mask)
         
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         yellow_circles = []
+        # Alan eşiği küçültülmüş maskenin piksel ölçeğine çevrilir
+        min_area = self.yellow_min_area * scale * scale
         
         for contour in contours:
             area = cv2.contourArea(contour)
-            if area > 100:
+            if area > min_area:
                 (x, y), radius = cv2.minEnclosingCircle(contour)
-                yellow_circles.append((int(x), int(y), int(radius)))
+                yellow_circles.append((int(x / scale), int(y / scale), int(radius / scale)))
         
         return yellow_circles
+    def _mask_buffer(self, shape):
+        mask = getattr(self._mask_buffers, 'value', None)
+        if mask is None or mask.shape != shape:
+            mask = np.empty(shape, np.uint8)
+            self._mask_buffers.value = mask
+        return mask
     def track_movement(self, frame, prev_frame):
-        gray1 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
+        # frame / prev_frame: BGR, gri görüntü ya da PreparedFrame olabilir
+        gray1 = to_gray(frame)
+        gray2 = to_gray(prev_frame)
+        if self.tracking_mode == 'persistent':
+            return self._track_persistent(gray1, gray2)
         
         corners = cv2.goodFeaturesToTrack(gray2, maxCorners=100, qualityLevel=0.01, minDistance=10)
         if corners is not None and len(corners) > 0:
@@ -44,60 +261,364 @@ class VideoAnalyzer:
             good_old = corners[status == 1]
             
             if len(good_new) > 0:
-                displacement = good_new - good_old
-                velocity = float(np.mean(np.sqrt(displacement[:, 0]**2 + displacement[:, 1]**2)))
-                direction = float(np.mean(np.arctan2(displacement[:, 1], displacement[:, 0]) * 180 / np.pi))
-                return {'velocity': velocity, 'direction': direction}
+                return self._movement_from_tracks(good_new, good_old)
         
         return {'velocity': 0.0, 'direction': 0.0}
-    def analyze_video(self):
-        frame_count = 0
-        prev_frame = None
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            circles = self.detect_circles(frame)
-            yellow_circles = self.detect_yellow_circles(frame)
-            self.circle_data.append({
+    def _track_persistent(self, gray1, gray2):
+        points = self._tracked_points
+        if (points is None or len(points) < self.min_tracked_points
+                or self._frames_since_detect >= self.redetect_interval):
+            points = cv2.goodFeaturesToTrack(gray2, maxCorners=100, qualityLevel=0.01, minDistance=10)
+            self._frames_since_detect = 0
+        if points is None or len(points) == 0:
+            self._tracked_points = None
+            return {'velocity': 0.0, 'direction': 0.0}
+        
+        new_points, status, error = cv2.calcOpticalFlowPyrLK(gray2, gray1, points, None)
+        # İleri-geri tutarlılık: geri izlenen nokta başlangıca yakın değilse track'i at
+        back_points, back_status, back_error = cv2.calcOpticalFlowPyrLK(gray1, gray2, new_points, None)
+        fb_error = np.linalg.norm((points - back_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_threshold)
+        good_new = new_points.reshape(-1, 2)[good]
+        good_old = points.reshape(-1, 2)[good]
+        
+        self._tracked_points = good_new.reshape(-1, 1, 2)
+        self._frames_since_detect += 1
+        if len(good_new) > 0:
+            return self._movement_from_tracks(good_new, good_old)
+        return {'velocity': 0.0, 'direction': 0.0}
+    def _movement_from_tracks(self, good_new, good_old):
+        displacement = good_new - good_old
+        velocity = float(np.mean(np.sqrt(displacement[:, 0]**2 + displacement[:, 1]**2)))
+        direction = float(np.mean(np.arctan2(displacement[:, 1], displacement[:, 0]) * 180 / np.pi))
+        return {'velocity': velocity, 'direction': direction}
+    def detect_frame(self, prepared, rois=None):
+        with self.metrics.stage('detect_circles'):
+            circles = self.detect_circles(prepared, rois)
+        with self.metrics.stage('detect_yellow_circles'):
+            yellow_circles = self.detect_yellow_circles(prepared)
+        return circles, yellow_circles
+    def read_frames(self, start=0, end=None):
+        # (frame_count, PreparedFrame) üretir; atlanan frame'ler sadece grab edilir
+        # (decode edilmez), PreparedFrame yerine None döner.
+        # start/end: capture'ın zaten start'a konumlandığı [start, end) aralığı (parçalı analiz)
+        frame_count = start
+        last_analyzed = None
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        while end is None or frame_count < end:
+            if last_analyzed is None or self._should_analyze(frame_count, last_analyzed, fps):
+                with self.metrics.stage('decode'):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    break
+                last_analyzed = frame_count
+                yield frame_count, PreparedFrame(frame)
+            else:
+                with self.metrics.stage('grab'):
+                    grabbed = self.cap.grab()
+                if not grabbed:
+                    break
+                yield frame_count, None
+            frame_count += 1
+    def _should_analyze(self, frame_count, last_analyzed, fps):
+        if self.sampling == 'stride':
+            return frame_count % self.sample_stride == 0
+        if self.sampling == 'rate':
+            if fps <= 0 or self.sample_rate >= fps:
+                return True
+            return int(frame_count * self.sample_rate / fps) != int(last_analyzed * self.sample_rate / fps)
+        if self.sampling == 'adaptive':
+            return frame_count - last_analyzed > self._adaptive_skip
+        return True
+    def _update_adaptive_sampling(self, movement, prev_movement, circles_count, prev_circles_count):
+        changed = (circles_count != prev_circles_count
+                   or abs(movement['velocity'] - prev_movement['velocity']) > self.velocity_change_threshold)
+        if changed:
+            self._adaptive_skip = 0
+        else:
+            self._adaptive_skip = min(self.max_skip, self._adaptive_skip * 2 or 1)
+    def _live_frames(self, pace=False):
+        # Grabber thread sürekli okur ve sadece en son frame'i tutar; işleme
+        # yetişemezse aradaki frame'ler sıraya girmez, atlanmış olarak işaretlenir
+        state = {'latest': None, 'finished': False, 'error': None}
+        ready = threading.Condition()
+        stop = threading.Event()
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        def grab():
+            frame_count = 0
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    if pace and fps > 0:
+                        # Yerel dosyayı kendi fps'inde oynat (canlı kaynak simülasyonu)
+                        delay = start + frame_count / fps - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    ret, frame = self.cap.read()
+                    if not ret:
+                        break
+                    with ready:
+                        state['latest'] = (frame_count, frame)
+                        ready.notify()
+                    frame_count += 1
+            except Exception as e:
+                state['error'] = e
+            with ready:
+                state['finished'] = True
+                ready.notify()
+        grabber = threading.Thread(target=grab, daemon=True)
+        grabber.start()
+        next_frame = 0
+        try:
+            while True:
+                with ready:
+                    while state['latest'] is None and not state['finished']:
+                        ready.wait()
+                    latest, state['latest'] = state['latest'], None
+                if latest is None:
+                    if state['error'] is not None:
+                        raise state['error']
+                    break
+                frame_count, frame = latest
+                for dropped in range(next_frame, frame_count):
+                    yield dropped, None
+                yield frame_count, PreparedFrame(frame)
+                next_frame = frame_count + 1
+        finally:
+            stop.set()
+            grabber.join()
+    def _sequential_frames(self, source=None):
+        for frame_count, prepared in (source if source is not None else self.read_frames()):
+            if prepared is None:
+                yield frame_count, None, None
+                continue
+            height, width = prepared.frame.shape[:2]
+            rois = self.circle_search_rois(frame_count, width, height)
+            yield frame_count, prepared, self.detect_frame(prepared, rois)
+    def _decode_worker(self, frames, stop):
+        # Sonlandırıcı (None) ve hata da stop'a bakarak konur: toplayıcı erken
+        # durursa dolu kuyrukta sonsuza kadar beklenmez
+        try:
+            for item in self.read_frames():
+                if not self._put_until_stopped(frames, item, stop):
+                    return
+        except Exception as e:
+            self._put_until_stopped(frames, e, stop)
+            return
+        self._put_until_stopped(frames, None, stop)
+    def _put_until_stopped(self, frames, item, stop):
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    def _pipelined_frames(self):
+        # Decoder thread -> sınırlı kuyruk -> detector havuzu -> sıralı toplayıcı.
+        # OpenCV çekirdekleri GIL'i bıraktığı için detector'lar paralel çalışır.
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        decoder = threading.Thread(target=self._decode_worker, args=(frames, stop), daemon=True)
+        decoder.start()
+        pending = deque()
+        max_pending = self.pipeline_workers * 2
+        try:
+            with ThreadPoolExecutor(max_workers=self.pipeline_workers) as pool:
+                while True:
+                    item = frames.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    frame_count, prepared = item
+                    self.metrics.sample_queue('decoded_frames', frames.qsize())
+                    self.metrics.sample_queue('pending_detections', len(pending))
+                    future = pool.submit(self.detect_frame, prepared) if prepared is not None else None
+                    pending.append((frame_count, prepared, future))
+                    if len(pending) >= max_pending:
+                        frame_count, prepared, future = pending.popleft()
+                        yield frame_count, prepared, future.result() if future else None
+                while pending:
+                    frame_count, prepared, future = pending.popleft()
+                    yield frame_count, prepared, future.result() if future else None
+        finally:
+            stop.set()
+            decoder.join()
+    def get_video_info(self):
+        return {
+            'path': self.video_path,
+            'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': float(self.cap.get(cv2.CAP_PROP_FPS)),
+        }
+    def iter_frame_results(self, frames=None, prev_frame=None):
+        # Her frame için (circle_entry, movement_entry) döner; ilk frame'in hareketi None.
+        # prev_frame: (frame_count, PreparedFrame) - parçalı analizde bir önceki parçanın son frame'i
+        if frames is None:
+            frames = self._pipelined_frames() if self.pipeline_workers > 0 else self._sequential_frames()
+        # Önceki frame'in sadece gri hali tutulur, BGR kopyası gerekmez
+        prev_gray = prev_frame[1].gray if prev_frame is not None else None
+        prev_analyzed = prev_frame[0] if prev_frame is not None else 0
+        last_movement = {'velocity': 0.0, 'direction': 0.0}
+        last_circles_count = 0
+        for frame_count, prepared, detections in frames:
+            if prepared is None:
+                # Atlanan frame: açıkça işaretlenir, hareket son ölçümden taşınır
+                circle_entry = {
+                    'frame': frame_count,
+                    'circles_count': 0,
+                    'circles': [],
+                    'yellow_circles': [],
+                    'skipped': True
+                }
+                if self.circle_tracker is not None:
+                    circle_entry['tracks'] = []
+                movement = None
+                if frame_count > 0:
+                    movement = {'velocity': last_movement['velocity'],
+                                'direction': last_movement['direction'],
+                                'frame': frame_count, 'skipped': True}
+                self.metrics.count('frames_skipped')
+                yield circle_entry, movement
+                continue
+            circles, yellow_circles = detections
+            self._last_circles = circles
+            circle_entry = {
                 'frame': frame_count, 
                 'circles_count': len(circles), 
                 'circles': circles,
                 'yellow_circles': yellow_circles
-            })
-            if prev_frame is not None:
-                movement = self.track_movement(frame, prev_frame)
+            }
+            if self.circle_tracker is not None:
+                with self.metrics.stage('track_circles'):
+                    tracks = self.circle_tracker.update(circles, yellow_circles, frame_count)
+                circle_entry['tracks'] = [track.to_entry() for track in tracks]
+            movement = None
+            if prev_gray is not None:
+                with self.metrics.stage('track_movement'):
+                    movement = self.track_movement(prepared, prev_gray)
+                gap = frame_count - prev_analyzed
+                if gap > 1:
+                    # Birden fazla frame üzerinden ölçülen hız frame başına çevrilir
+                    movement['velocity'] /= gap
+                if self.sampling == 'adaptive':
+                    self._update_adaptive_sampling(movement, last_movement, len(circles), last_circles_count)
                 movement['frame'] = frame_count
-                self.movement_data.append(movement)
-            prev_frame = frame.copy()
+                last_movement = movement
+            last_circles_count = len(circles)
+            prev_gray = prepared.gray
+            prev_analyzed = frame_count
+            if self.metrics.enabled:
+                self.metrics.frame_done(time.perf_counter() - prepared.created)
+            yield circle_entry, movement
+    def stream(self, drop_frames=True, pace=False):
+        # Canlı kaynak (kamera indeksi, RTSP adresi ya da dosya) için frame frame sonuç üretir.
+        # drop_frames: işleme gecikirse eski frame'leri atla; pace: dosyayı kendi fps'inde oku
+        source = self._live_frames(pace) if drop_frames else self.read_frames()
+        try:
+            for circle_entry, movement in self.iter_frame_results(self._sequential_frames(source)):
+                yield circle_entry, movement
+        finally:
+            source.close()
+            self.cap.release()
+    def analyze_video(self, writer=None):
+        # writer: her frame'i işlenirken diske yazan AnalysisStreamWriter (analysis_io)
+        video_info = self.get_video_info()
+        if writer is not None:
+            writer.write_header(video_info)
+        frame_count = 0
+        for circle_entry, movement in self.iter_frame_results():
+            if self.keep_history:
+                self.circle_data.append(circle_entry)
+                if movement is not None:
+                    self.movement_data.append(movement)
+            if writer is not None:
+                with self.metrics.stage('write_results'):
+                    writer.write_frame(circle_entry, movement)
             frame_count += 1
         self.cap.release()
+        video_info['total_frames'] = frame_count
+        if writer is not None:
+            writer.write_footer(video_info)
         return {
-            'video_info': {
-                'path': self.video_path,
-                'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'fps': float(self.cap.get(cv2.CAP_PROP_FPS)),
-                'total_frames': frame_count
-            },
+            'video_info': video_info,
             'movement_data': self.movement_data,
             'circle_detection_data': self.circle_data
         }
+    def supports_chunking(self):
+        # Parça sınırında durum taşıyan ayarlar (örnekleme geçmişi, LK noktaları,
+        # ROI ve çember takibi) sıralı çalışmayla aynı sonucu vermez
+        return (self.sampling == 'all' and self.tracking_mode == 'detect'
+                and not self.roi_search and self.circle_tracker is None)
+    def frame_count(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    def analyze_chunk(self, start, end=None):
+        """[start, end) frame aralığını analiz et (end=None: videonun sonuna kadar).
+
+        start > 0 ise start - 1 frame'i örtüşme olarak decode edilir ve sadece
+        track_movement için önceki frame olarak kullanılır; böylece parçanın ilk
+        hareket kaydı da sıralı çalışmadakiyle aynıdır. Sonuç analyze_video ile
+        aynı biçimdedir; video_info'da ayrıca 'chunk' aralığı bulunur.
+        """
+        if not self.supports_chunking():
+            raise ValueError("Chunked analysis needs sampling='all', tracking_mode='detect', "
+                             "no roi_search and no circle tracking")
+        video_info = self.get_video_info()
+        first = max(0, start - 1)
+        self._seek(first)
+        prev_frame = None
+        if start > 0:
+            with self.metrics.stage('decode'):
+                ret, frame = self.cap.read()
+            if ret:
+                prev_frame = (first, PreparedFrame(frame))
+        circle_data = []
+        movement_data = []
+        frames = self._sequential_frames(self.read_frames(start, end))
+        for circle_entry, movement in self.iter_frame_results(frames, prev_frame):
+            circle_data.append(circle_entry)
+            if movement is not None:
+                movement_data.append(movement)
+        self.cap.release()
+        video_info['total_frames'] = len(circle_data)
+        video_info['chunk'] = [start, start + len(circle_data)]
+        return {
+            'video_info': video_info,
+            'movement_data': movement_data,
+            'circle_detection_data': circle_data
+        }
+    def _seek(self, frame_index):
+        if frame_index == 0:
+            return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        if int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_index:
+            # Backend konumlanamadı: baştan açıp frame'leri decode etmeden atla
+            self.cap.release()
+            self._cap = cv2.VideoCapture(self.video_path)
+            for _ in range(frame_index):
+                if not self.cap.grab():
+                    break
     def save_analysis_results(self, results, output_path):
-        def convert_numpy(obj):
-            if hasattr(obj, 'dtype'):
-                if 'int' in str(obj.dtype):
-                    return int(obj)
-                elif 'float' in str(obj.dtype):
-                    return float(obj)
-            elif isinstance(obj, list):
-                return [convert_numpy(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {key: convert_numpy(value) for key, value in obj.items()}
-            elif isinstance(obj, tuple):
-                return tuple(convert_numpy(item) for item in obj)
-            return obj
-        
-        clean_results = convert_numpy(results)
+        # Değerler üretildikleri yerde Python tiplerine çevrilir; default sadece
+        # dışarıdan gelen numpy skalerleri için çağrılır
         with open(output_path, 'w') as f:
-            json.dump(clean_results, f)
+            json.dump(results, f, default=to_builtin)
+def split_frame_ranges(total_frames, chunks):
+    """total_frames'i yaklaşık eşit [start, end) aralıklarına böl; son aralık sona kadar açık"""
+    chunks = max(1, min(chunks, total_frames))
+    bounds = [total_frames * i // chunks for i in range(chunks + 1)]
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(chunks)]
+    # Frame sayısı metadata'dan gelir ve yanlış olabilir; son parça EOF'a kadar okur
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+def merge_chunk_results(parts):
+    """analyze_chunk sonuçlarını frame sırasıyla tek analiz sonucunda birleştir"""
+    parts = sorted(parts, key=lambda part: part['video_info']['chunk'][0])
+    video_info = {key: value for key, value in parts[0]['video_info'].items() if key != 'chunk'}
+    video_info['total_frames'] = sum(part['video_info']['total_frames'] for part in parts)
+    return {
+        'video_info': video_info,
+        'movement_data': [movement for part in parts for movement in part['movement_data']],
+        'circle_detection_data': [entry for part in parts for entry in part['circle_detection_data']]
+    }